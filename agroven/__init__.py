@@ -0,0 +1,49 @@
+# --- MOTOR AGROVEN (sin interfaz) ---
+# Lógica de negocio del simulador, importable sin Streamlit (cron, notebooks, scripts).
+#   from agroven import GanaderiaConfig, simular_proyecto
+# Los nombres se resuelven al primer uso: `import agroven` no carga numpy ni pandas,
+# y cada submódulo se importa sólo cuando se pide uno de sus nombres.
+
+# Nombre público -> submódulo que lo define
+_EXPORTS = {
+    "GanaderiaConfig": "modelo",
+    "simular_proyecto": "modelo",
+    "simular_resultado": "modelo",
+    "CAMPOS_CONFIG": "lotes",
+    "COLUMNAS_RESULTADO": "resultados",
+    "ResultadoSimulacion": "resultados",
+    "simular_lote": "lotes",
+    "lote_a_dataframe": "lotes",
+    "PARAMETROS_RIESGO": "riesgo",
+    "distribuciones_por_defecto": "riesgo",
+    "simular_monte_carlo": "riesgo",
+    "analisis_sensibilidad": "sensibilidad",
+    "OBJETIVOS": "optimizador",
+    "ANIO_INICIO_FLUJO_MINIMO": "optimizador",
+    "optimizar_politica": "optimizador",
+    "PERFIL_COHORTES": "cohortes",
+    "PERFIL_PLANO": "cohortes",
+    "simular_cohortes_lote": "cohortes",
+    "simular_cohortes": "cohortes",
+    "simular_cartera": "cartera",
+    "retorno_marginal": "cartera",
+    "CacheResultados": "cache",
+    "version_modelo": "cache",
+    "TIR_OK": "finanzas",
+    "tir_lote": "finanzas",
+    "vpn_lote": "finanzas",
+    "metricas_lote": "finanzas",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(nombre):
+    if nombre not in _EXPORTS:
+        raise AttributeError(f"module 'agroven' has no attribute {nombre!r}")
+    from importlib import import_module
+    valor = getattr(import_module(f"agroven.{_EXPORTS[nombre]}"), nombre)
+    globals()[nombre] = valor # Las siguientes búsquedas no pasan por __getattr__
+    return valor
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
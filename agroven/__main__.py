@@ -0,0 +1,5 @@
+import sys
+
+from agroven.cli import main
+
+sys.exit(main())
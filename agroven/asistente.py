@@ -0,0 +1,142 @@
+# --- ASISTENTE: BACKENDS DEL MODELO ---
+# El backend se crea una vez por proceso y se reutiliza entre reruns y sesiones (conexiones HTTP
+# incluidas). Las respuestas llegan como un generador de trozos de texto para pintarlas a medida
+# que se generan (st.write_stream).
+#   backend = crear_backend("gemini", api_key=...)
+#   for trozo in backend.responder(pregunta, system_instruction): ...
+# Backends: "gemini" (API de Google; AGROVEN_GEMINI_URL apunta a otro servidor compatible, p. ej.
+# uno falso para medir latencia) y "local" (respuesta extractiva, sin red).
+import os
+import random
+import threading
+import time
+
+MODELO_POR_DEFECTO = "gemini-flash-lite-latest"
+TIMEOUT_SEGUNDOS = 60
+REINTENTOS = 3 # Reintentos después del primer intento
+ESPERA_INICIAL = 1.0 # Segundos; se duplica en cada reintento (con jitter)
+ESPERA_MAXIMA = 8.0
+MAX_CONCURRENTES = 4 # Consultas simultáneas por proceso
+ESPERA_CUPO = 30 # Segundos esperando un cupo antes de rendirse
+ESTADOS_REINTENTABLES = {408, 429, 500, 502, 503, 504}
+
+class AsistenteOcupado(RuntimeError):
+    pass
+
+class _Backend:
+    # Cupo de concurrencia, reintentos con backoff exponencial y métricas de latencia comunes.
+    # Sólo se reintenta si todavía no se emitió ningún trozo (no se duplica texto ya mostrado).
+    nombre = "base"
+
+    def __init__(self, max_concurrentes=MAX_CONCURRENTES, reintentos=REINTENTOS,
+                 espera_inicial=ESPERA_INICIAL, espera_maxima=ESPERA_MAXIMA, espera_cupo=ESPERA_CUPO):
+        self.cupos = threading.BoundedSemaphore(max_concurrentes)
+        self.reintentos = reintentos
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.espera_cupo = espera_cupo
+        self.lock = threading.Lock()
+        self.metricas = {"consultas": 0, "reintentos": 0, "errores": 0,
+                         "primer_trozo_s": None, "total_s": None}
+
+    def _generar(self, pregunta, system_instruction, relevantes, historial):
+        raise NotImplementedError
+
+    def _reintentable(self, error):
+        return False
+
+    def _contar(self, **valores):
+        with self.lock:
+            for clave, valor in valores.items():
+                if clave in ("consultas", "reintentos", "errores"):
+                    self.metricas[clave] += valor
+                else:
+                    self.metricas[clave] = valor
+
+    def responder(self, pregunta, system_instruction="", relevantes=(), historial=()):
+        # Generador de trozos de texto de la respuesta.
+        # historial: vueltas previas [{"role": "user" | "model", "texto": str}] (ver conversacion.py)
+        if not self.cupos.acquire(timeout=self.espera_cupo):
+            raise AsistenteOcupado("El asistente está atendiendo demasiadas consultas; intenta de nuevo.")
+        try:
+            self._contar(consultas=1)
+            inicio = time.perf_counter()
+            intento = 0
+            while True:
+                emitido = False
+                try:
+                    for trozo in self._generar(pregunta, system_instruction, relevantes, historial):
+                        if not emitido:
+                            emitido = True
+                            self._contar(primer_trozo_s=time.perf_counter() - inicio)
+                        yield trozo
+                    self._contar(total_s=time.perf_counter() - inicio)
+                    return
+                except Exception as e:
+                    if emitido or intento >= self.reintentos or not self._reintentable(e):
+                        self._contar(errores=1)
+                        raise
+                    intento += 1
+                    self._contar(reintentos=1)
+                    espera = min(self.espera_inicial * 2 ** (intento - 1), self.espera_maxima)
+                    time.sleep(espera * random.uniform(0.5, 1.0))
+        finally:
+            self.cupos.release()
+
+class BackendGemini(_Backend):
+    nombre = "gemini"
+
+    def __init__(self, api_key, modelo=MODELO_POR_DEFECTO, base_url=None, timeout=TIMEOUT_SEGUNDOS,
+                 temperatura=0.3, **opciones):
+        super().__init__(**opciones)
+        from google import genai
+        from google.genai import types
+        self.types = types
+        self.modelo = modelo
+        self.temperatura = temperatura
+        # Los reintentos los maneja responder(); el SDK sólo aplica el timeout (en milisegundos)
+        self.cliente = genai.Client(api_key=api_key, http_options=types.HttpOptions(
+            timeout=int(timeout * 1000), base_url=base_url or os.environ.get("AGROVEN_GEMINI_URL")))
+
+    def _generar(self, pregunta, system_instruction, relevantes, historial):
+        config = self.types.GenerateContentConfig(system_instruction=system_instruction or None,
+                                                  temperature=self.temperatura)
+        contenidos = [{"role": m["role"], "parts": [{"text": m["texto"]}]} for m in historial]
+        contenidos.append({"role": "user", "parts": [{"text": pregunta}]})
+        for parte in self.cliente.models.generate_content_stream(model=self.modelo, contents=contenidos, config=config):
+            if parte.text:
+                yield parte.text
+
+    def _reintentable(self, error):
+        import httpx
+        from google.genai import errors
+        if isinstance(error, errors.APIError):
+            return error.code in ESTADOS_REINTENTABLES
+        return isinstance(error, httpx.TransportError) # Timeouts y fallos de conexión
+
+class BackendLocal(_Backend):
+    # Respuesta extractiva con los fragmentos recuperados, entregada palabra a palabra
+    nombre = "local"
+    modelo = "local"
+
+    def _generar(self, pregunta, system_instruction, relevantes, historial):
+        from agroven.recuperacion import respuesta_local
+        texto = respuesta_local(pregunta, list(relevantes))
+        inicio = 0
+        while inicio < len(texto):
+            fin = texto.find(" ", inicio + 1)
+            fin = len(texto) if fin < 0 else fin
+            yield texto[inicio:fin]
+            inicio = fin
+
+BACKENDS = {"gemini": BackendGemini, "local": BackendLocal}
+
+def crear_backend(nombre=None, **opciones):
+    # nombre: "gemini" | "local"; por defecto la variable AGROVEN_ASISTENTE o "gemini"
+    nombre = nombre or os.environ.get("AGROVEN_ASISTENTE", "gemini")
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend de asistente desconocido: {nombre} (opciones: {', '.join(BACKENDS)})")
+    if nombre == "local":
+        opciones.pop("api_key", None)
+        opciones.pop("modelo", None)
+    return BACKENDS[nombre](**opciones)
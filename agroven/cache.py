@@ -0,0 +1,189 @@
+# --- CACHÉ DE RESULTADOS (Memoria + SQLite) ---
+# Sirve simulaciones y métricas por huella de config, compartidas entre sesiones y reinicios:
+#   1) memoria: LRU del proceso, con tope de entradas y vencimiento (TTL)
+#   2) disco: SQLite compartido por todos los procesos que usan el mismo archivo
+# La clave incluye la versión del modelo (hash del código del motor): si cambian las reglas de
+# negocio, las entradas viejas dejan de coincidir y se purgan al abrir la base.
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+# Módulos cuyas reglas determinan los resultados (su código define la versión del modelo)
+MODULOS_MODELO = ["modelo.py", "resultados.py", "lotes.py", "cohortes.py", "finanzas.py"]
+
+# Carpeta .cache del repositorio: base de resultados, índices BM25 y textos extraídos
+CARPETA_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+
+def ruta_cache(variable, nombre):
+    # Ruta de la variable de entorno `variable` o, si no está definida, CARPETA_CACHE/nombre
+    return os.environ.get(variable, os.path.join(CARPETA_CACHE, nombre))
+
+def guardar_atomico(ruta, escribir, prefijo, max_guardados):
+    # Escribe el archivo con escribir(f) en un temporal y lo reemplaza de una vez (otro proceso
+    # nunca lee un archivo a medias); después conserva en la carpeta sólo los `max_guardados`
+    # archivos más recientes que empiezan con `prefijo`. Devuelve False si el disco no es escribible.
+    carpeta = os.path.dirname(ruta)
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8", newline="") as f:
+            escribir(f)
+        os.replace(temporal, ruta)
+        guardados = sorted((os.path.join(carpeta, n) for n in os.listdir(carpeta)
+                            if n.startswith(prefijo) and not n.endswith(".tmp")),
+                           key=os.path.getmtime, reverse=True)
+        for viejo in guardados[max_guardados:]:
+            os.remove(viejo)
+    except OSError:
+        return False
+    return True
+
+RUTA_CACHE_DB = ruta_cache("AGROVEN_CACHE_DB", "resultados.sqlite")
+
+@lru_cache(maxsize=None)
+def version_modelo():
+    h = hashlib.sha256()
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    for nombre in MODULOS_MODELO:
+        with open(os.path.join(carpeta, nombre), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:12]
+
+def estadisticas_nivel(nivel):
+    # Contadores de un nivel (CacheLRU o CacheSQLite) con entradas y tasa de aciertos
+    consultas = nivel.contadores["aciertos"] + nivel.contadores["fallos"]
+    return dict(nivel.contadores, entradas=len(nivel),
+                tasa_aciertos=nivel.contadores["aciertos"] / consultas if consultas else 0.0)
+
+class CacheLRU:
+    # LRU en memoria con tope de entradas y TTL en segundos (None = sin vencimiento). Seguro entre hilos.
+    def __init__(self, max_entradas=256, ttl_segundos=3600):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self.entradas = OrderedDict() # clave -> (instante, valor)
+        self.lock = threading.Lock()
+        self.contadores = {"aciertos": 0, "fallos": 0, "vencidos": 0, "desalojos": 0}
+
+    def obtener(self, clave):
+        # Devuelve (encontrado, valor)
+        with self.lock:
+            entrada = self.entradas.get(clave)
+            if entrada is not None and self.ttl_segundos is not None \
+                    and time.monotonic() - entrada[0] > self.ttl_segundos:
+                del self.entradas[clave]
+                self.contadores["vencidos"] += 1
+                entrada = None
+            if entrada is None:
+                self.contadores["fallos"] += 1
+                return False, None
+            self.entradas.move_to_end(clave)
+            self.contadores["aciertos"] += 1
+            return True, entrada[1]
+
+    def guardar(self, clave, valor):
+        with self.lock:
+            self.entradas[clave] = (time.monotonic(), valor)
+            self.entradas.move_to_end(clave)
+            while len(self.entradas) > self.max_entradas:
+                self.entradas.popitem(last=False)
+                self.contadores["desalojos"] += 1
+
+    def __len__(self):
+        return len(self.entradas)
+
+class CacheSQLite:
+    # Tabla clave -> valor (pickle) en un archivo SQLite. Conserva las `max_filas` usadas más recientemente.
+    # Si el archivo no se puede abrir (solo lectura, disco lleno) el nivel queda desactivado.
+    def __init__(self, ruta=RUTA_CACHE_DB, max_filas=5000):
+        self.ruta = ruta
+        self.max_filas = max_filas
+        self.lock = threading.Lock()
+        self.contadores = {"aciertos": 0, "fallos": 0, "errores": 0}
+        self.conexion = None
+        try:
+            if os.path.dirname(ruta):
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            self.conexion = sqlite3.connect(ruta, timeout=5, check_same_thread=False)
+            with self.conexion:
+                self.conexion.execute("""CREATE TABLE IF NOT EXISTS resultados (
+                    clave TEXT PRIMARY KEY, version TEXT, valor BLOB, usado REAL)""")
+                # Entradas de otras versiones del modelo ya no pueden coincidir
+                self.conexion.execute("DELETE FROM resultados WHERE version != ?", (version_modelo(),))
+        except (sqlite3.Error, OSError):
+            self.conexion = None
+
+    def obtener(self, clave):
+        if self.conexion is None:
+            return False, None
+        with self.lock:
+            try:
+                fila = self.conexion.execute("SELECT valor FROM resultados WHERE clave = ?", (clave,)).fetchone()
+                if fila is None:
+                    self.contadores["fallos"] += 1
+                    return False, None
+                with self.conexion:
+                    self.conexion.execute("UPDATE resultados SET usado = ? WHERE clave = ?", (time.time(), clave))
+                self.contadores["aciertos"] += 1
+                return True, pickle.loads(fila[0])
+            except (sqlite3.Error, pickle.UnpicklingError, EOFError, AttributeError):
+                self.contadores["errores"] += 1
+                return False, None
+
+    def guardar(self, clave, valor):
+        if self.conexion is None:
+            return
+        with self.lock:
+            try:
+                with self.conexion:
+                    self.conexion.execute("INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?)",
+                                          (clave, version_modelo(), pickle.dumps(valor), time.time()))
+                    self.conexion.execute("""DELETE FROM resultados WHERE clave NOT IN (
+                        SELECT clave FROM resultados ORDER BY usado DESC LIMIT ?)""", (self.max_filas,))
+            except sqlite3.Error:
+                self.contadores["errores"] += 1
+
+    def __len__(self):
+        if self.conexion is None:
+            return 0
+        with self.lock:
+            return self.conexion.execute("SELECT COUNT(*) FROM resultados").fetchone()[0]
+
+class CacheResultados:
+    # Caché en dos niveles. Uso:
+    #   valor, nivel = cache.obtener("simulacion", config, lambda: simular_proyecto(10, config), years=10)
+    # nivel: "memoria" | "disco" | "calculado". Un acierto en disco se sube a memoria.
+    def __init__(self, max_entradas=256, ttl_segundos=3600, ruta_db=RUTA_CACHE_DB, max_filas=5000):
+        self.memoria = CacheLRU(max_entradas, ttl_segundos)
+        self.disco = CacheSQLite(ruta_db, max_filas) if ruta_db else None
+
+    def clave(self, tipo, config, **extra):
+        partes = [tipo, version_modelo(), config.huella] + [f"{k}={extra[k]!r}" for k in sorted(extra)]
+        return "|".join(partes)
+
+    def obtener(self, tipo, config, calcular, **extra):
+        clave = self.clave(tipo, config, **extra)
+        encontrado, valor = self.memoria.obtener(clave)
+        if encontrado:
+            return valor, "memoria"
+        if self.disco is not None:
+            encontrado, valor = self.disco.obtener(clave)
+            if encontrado:
+                self.memoria.guardar(clave, valor)
+                return valor, "disco"
+        valor = calcular()
+        self.memoria.guardar(clave, valor)
+        if self.disco is not None:
+            self.disco.guardar(clave, valor)
+        return valor, "calculado"
+
+    def estadisticas(self):
+        # {"memoria": {...}, "disco": {...}} con contadores, entradas y tasa de aciertos
+        niveles = {"memoria": self.memoria}
+        if self.disco is not None and self.disco.conexion is not None:
+            niveles["disco"] = self.disco
+        return {nombre: estadisticas_nivel(nivel) for nombre, nivel in niveles.items()}
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from agroven.modelo import GanaderiaConfig
+from agroven.lotes import _avanzar_lote, _tabla_escenarios
+from agroven.resultados import COLUMNAS_RESULTADO, COLUMNAS_CABEZAS, COLUMNAS_DINERO, _formatear_lote, presentar
+from agroven.finanzas import metricas_lote
+
+# --- CARTERA DE FINCAS (Varias propiedades con arranques escalonados) ---
+# Cada finca es una fila con su propia config (cualquier subconjunto de campos de GanaderiaConfig:
+# vientres_iniciales, capacidad_maxima, capex_infraestructura...), un nombre ("Finca") y el año
+# de la cartera en que arranca ("Año Inicio", 1 = primer año). Todas las fincas avanzan juntas,
+# año calendario por año calendario, en un solo lote vectorizado (cientos de fincas x 30 años
+# en milisegundos). Sin bolsa común las fincas son independientes y el lote se puede repartir
+# entre procesos (procesos > 1).
+# Bolsa común: cada finca aporta el % de reinversión de su flujo operativo positivo a una bolsa
+# del grupo, que compra vientres primero en la finca de mayor retorno marginal (con cupo bajo
+# su techo). Lo que no se invierte queda como flujo para los socios.
+# El retorno marginal sólo depende de parámetros biológicos y de precios: fincas que comparten los
+# de la barra lateral empatan. El desempate es la cobertura de costos fijos (primero la finca a la
+# que más le falta para cubrirlos con el margen de su hato) y, si sigue el empate, el orden de la tabla.
+# Con bolsa común cada finca paga su aporte (menos su parte de lo que la bolsa no gastó) y recibe
+# sin cargo las vacas que la bolsa le asigne: su "Reinversión" y su flujo neto miden lo que aporta
+# al grupo, y sus métricas propias ya no son las de una finca autónoma (la TIR útil es la consolidada).
+# Flujo consolidado: el CAPEX de cada finca se paga en el período en que arranca (t = Año Inicio - 1);
+# la TIR y el VPN del grupo se calculan sobre ese flujo, descontado al inicio de la cartera.
+TROZO_CARTERA = 2_000 # Fincas por tarea al repartir entre procesos
+
+def _tabla_fincas(fincas, years):
+    # Normaliza la entrada: DataFrame o lista de dicts (una finca por fila).
+    # Devuelve (nombres, inicio en años de espera, tabla de escenarios para el motor por lotes).
+    if not hasattr(fincas, "columns"):
+        fincas = pd.DataFrame(list(fincas))
+    if len(fincas) == 0:
+        raise ValueError("La cartera no tiene fincas")
+    nombres = (fincas["Finca"].astype(str).to_numpy() if "Finca" in fincas.columns
+               else np.array([f"Finca {i + 1}" for i in range(len(fincas))]))
+    anio_inicio = (fincas["Año Inicio"].fillna(1).to_numpy(float) if "Año Inicio" in fincas.columns
+                   else np.ones(len(fincas)))
+    if np.any(anio_inicio != np.round(anio_inicio)) or np.any(anio_inicio < 1) or np.any(anio_inicio > years):
+        raise ValueError(f"'Año Inicio' debe ser un entero entre 1 y {years}")
+    escenarios = fincas.drop(columns=[c for c in ("Finca", "Año Inicio") if c in fincas.columns])
+    # Celdas vacías -> valor por defecto (como en la corrida por lotes)
+    base = GanaderiaConfig()
+    escenarios = escenarios.fillna({col: getattr(base, col) for col in escenarios.columns if hasattr(base, col)})
+    return nombres, anio_inicio.astype(np.int64) - 1, escenarios
+
+def retorno_marginal(p):
+    # Retorno anual estimado por cada $ invertido en un vientre más: crías destetadas por vientre
+    # (preñez IATF + repaso, menos mermas; las hembras valorizadas como si se vendieran al destete)
+    # menos su costo variable e IATF.
+    preñez = p["tasa_preñez_iatf"] + (1 - p["tasa_preñez_iatf"]) * p["tasa_preñez_toro"]
+    destetados = preñez * (1 - p["mortalidad_gestacion"]) * (1 - p["mortalidad_cria"])
+    margen = (destetados * p["peso_destete_macho"] * p["precio_macho_destete"]
+              - p["costo_variable_hato"] - p["costo_iatf"])
+    return margen / p["precio_compra_vientre"]
+
+def _reinversion_bolsa(p, flujo_operativo, vientres_actuales, activo):
+    # Reparte la bolsa del año en orden de retorno marginal (desempate: cobertura de costos fijos),
+    # llenando el cupo de cada finca (compras enteras). La que ya no alcanza a llenarse recibe lo
+    # que queda; las siguientes nada.
+    # Devuelve (compras por finca, dinero que paga cada finca): lo gastado se cobra a las fincas
+    # en proporción a su aporte, así el flujo del grupo no cambia y cada finca carga lo que aportó.
+    aporte = np.where(activo & (flujo_operativo > 0), flujo_operativo * p["reinversion_utilidades"], 0.0)
+    bolsa = aporte.sum()
+    retorno = retorno_marginal(p)
+    precio = p["precio_compra_vientre"]
+    cupo = np.where(activo & (retorno > 0), np.maximum(np.trunc(p["capacidad_maxima"] - vientres_actuales), 0.0), 0.0)
+
+    # Costos fijos que el margen del hato actual todavía no cubre (negativo si ya los cubre)
+    faltante = p["costos_fijos"] - retorno * precio * vientres_actuales
+    orden = np.lexsort((-faltante, -retorno)) # Estable: último desempate, el orden de la tabla
+    costo = cupo[orden] * precio[orden]
+    disponible = np.maximum(bolsa - (np.cumsum(costo) - costo), 0.0) # Lo que queda al llegar a cada finca
+    compras = np.empty_like(cupo)
+    compras[orden] = np.minimum(np.trunc(disponible / precio[orden]), cupo[orden])
+    gastado = (compras * precio).sum()
+    pagado = aporte * (gastado / bolsa) if bolsa > 0 else np.zeros_like(aporte)
+    return compras, pagado
+
+def _trozo_cartera(escenarios, inicio, years, bolsa_comun=False):
+    parametros, _ = _tabla_escenarios(escenarios)
+    n = len(inicio) # Una tabla sin columnas de config trae parámetros de largo 1
+    parametros = {k: np.broadcast_to(v, (n,)) for k, v in parametros.items()}
+    return _avanzar_lote(parametros, n, years, inicio=inicio,
+                         reinversion=_reinversion_bolsa if bolsa_comun else None), parametros["capex_infraestructura"]
+
+def simular_cartera(fincas, years=30, bolsa_comun=False, procesos=1, tasa_descuento=0.10):
+    # Devuelve un dict con:
+    #   "consolidado": DataFrame por año de la cartera (columnas de simular_proyecto sumadas,
+    #                  más "Fincas Activas" y "CAPEX")
+    #   "fincas": DataFrame largo (una fila por finca y año de la cartera; ceros antes de arrancar)
+    #   "metricas": TIR, VPN, payback y necesidad máxima de caja del grupo (Series)
+    #   "metricas_fincas": las mismas métricas por finca, sobre su flujo en el calendario de la cartera
+    #                      (con bolsa común, sobre el flujo después de su aporte a la bolsa)
+    #   "flujos": flujo consolidado (years + 1), con los CAPEX en t = Año Inicio - 1
+    nombres, inicio, escenarios = _tabla_fincas(fincas, years)
+    n = len(nombres)
+
+    if procesos > 1 and not bolsa_comun and n > 1:
+        # Sin bolsa común las fincas no se afectan entre sí: trozos independientes por proceso
+        from concurrent.futures import ProcessPoolExecutor
+        tamano = min(TROZO_CARTERA, -(-n // procesos))
+        tareas = [(escenarios.iloc[i:i + tamano], inicio[i:i + tamano], years) for i in range(0, n, tamano)]
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            trozos = list(pool.map(_trozo_cartera, *zip(*tareas)))
+        salida = {col: np.concatenate([t[0][col] for t in trozos]) for col in COLUMNAS_CABEZAS + COLUMNAS_DINERO}
+        capex = np.concatenate([t[1] for t in trozos])
+    else:
+        # La bolsa común acopla a todas las fincas año a año: siempre un solo lote
+        resultado, capex = _trozo_cartera(escenarios, inicio, years, bolsa_comun)
+        salida = {col: resultado[col] for col in COLUMNAS_CABEZAS + COLUMNAS_DINERO}
+
+    # Flujo de cada finca en el calendario de la cartera: CAPEX al arrancar y flujo neto después
+    # (redondeado como en la tabla: una cartera de una sola finca da la misma TIR que el dashboard)
+    formateado = _formatear_lote(salida)
+    flujos_fincas = np.zeros((n, years + 1))
+    flujos_fincas[:, 1:] = formateado["Flujo Neto (Socios)"]
+    flujos_fincas[np.arange(n), inicio] -= capex
+    flujos = flujos_fincas.sum(axis=0)
+    matriz = np.vstack([flujos, flujos_fincas])
+    metricas = metricas_lote(matriz, tasa_descuento)
+
+    # Payback desde que arranca cada finca (antes, la caja en cero no cuenta como recuperada)
+    desde = np.concatenate([[inicio.min()], inicio])
+    recuperado = (np.cumsum(matriz, axis=1)[:, 1:] >= 0) & (np.arange(1, years + 1) > desde[:, np.newaxis])
+    metricas["Año Payback"] = np.where(recuperado.any(axis=1), np.argmax(recuperado, axis=1) + 1.0, np.nan)
+
+    consolidado = presentar({col: valores.sum(axis=0, keepdims=True) for col, valores in salida.items()})
+    anios = np.arange(1, years + 1)
+    consolidado.insert(1, "Fincas Activas", (inicio[:, np.newaxis] < anios).sum(axis=0))
+    consolidado["CAPEX"] = np.round(np.bincount(inicio, weights=capex, minlength=years), 2) # Pagado al iniciar el año
+
+    por_finca = pd.DataFrame({"Finca": np.repeat(nombres, years),
+                              **{col: formateado[col].reshape(-1) for col in COLUMNAS_RESULTADO}})
+
+    metricas_fincas = metricas.iloc[1:].reset_index(drop=True)
+    metricas_fincas.insert(0, "Finca", nombres)
+    metricas_fincas.insert(1, "Año Inicio", inicio + 1)
+    metricas_fincas.insert(2, "Vientres Final", formateado["Vientres"][:, -1])
+    return {"consolidado": consolidado, "fincas": por_finca, "metricas": metricas.iloc[0],
+            "metricas_fincas": metricas_fincas, "flujos": flujos}
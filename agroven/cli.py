@@ -0,0 +1,193 @@
+# --- CORRIDA POR LOTES (Línea de comandos) ---
+# Corre un archivo de escenarios sin levantar el dashboard:
+#   python -m agroven escenarios.csv -o resultados.parquet --years 10 --procesos 4
+#   python -m agroven fincas.csv -o consolidado.csv --cartera --years 30 [--bolsa-comun]
+# Cada fila del archivo es un escenario con cualquier subconjunto de campos de GanaderiaConfig
+# (los ausentes o vacíos toman el valor por defecto). Una columna opcional "Escenario" se usa como
+# identificador; si no está, se numera por posición en el archivo.
+# Formatos de entrada: CSV, JSON Lines (.jsonl), JSON (lista de objetos) y YAML (lista de mapas).
+# Formatos de salida: CSV o Parquet, según la extensión de -o.
+# Memoria acotada: el archivo se lee por trozos, hay como máximo 2 trozos por proceso en vuelo
+# y cada resultado se escribe apenas llega (en el orden del archivo). CSV y JSON Lines se leen
+# en streaming; JSON y YAML se cargan enteros antes de trocear.
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from agroven.modelo import GanaderiaConfig
+from agroven.lotes import simular_lote
+from agroven.resultados import COLUMNAS_RESULTADO
+from agroven.finanzas import metricas_lote
+
+TROZO_CLI = 5_000 # Escenarios por tarea
+
+def leer_escenarios(ruta, tamano_trozo=TROZO_CLI):
+    # Generador de DataFrames de hasta `tamano_trozo` escenarios.
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == ".csv":
+        yield from pd.read_csv(ruta, chunksize=tamano_trozo)
+        return
+    if extension == ".jsonl":
+        yield from pd.read_json(ruta, lines=True, chunksize=tamano_trozo)
+        return
+    if extension == ".json":
+        import json
+        with open(ruta, encoding="utf-8") as f:
+            registros = json.load(f)
+    elif extension in (".yaml", ".yml"):
+        import yaml
+        with open(ruta, encoding="utf-8") as f:
+            registros = yaml.safe_load(f)
+    else:
+        raise ValueError(f"Formato de escenarios no soportado: {extension} (use .csv, .jsonl, .json o .yaml)")
+
+    if isinstance(registros, dict):
+        registros = registros.get("escenarios", [registros])
+    for inicio in range(0, len(registros), tamano_trozo):
+        yield pd.DataFrame(registros[inicio:inicio + tamano_trozo])
+
+def correr_trozo(trozo, inicio, years=10, resumen=False, tasa_descuento=0.10):
+    # Simula un trozo de escenarios. `inicio` es la posición del trozo en el archivo.
+    # Detalle: una fila por escenario y año (columnas de simular_proyecto).
+    # Resumen: una fila por escenario con los finales y las métricas financieras.
+    if "Escenario" in trozo.columns:
+        ids = trozo["Escenario"].to_numpy()
+        trozo = trozo.drop(columns="Escenario")
+    else:
+        ids = np.arange(inicio, inicio + len(trozo))
+    # Celdas vacías (o campos ausentes en algunos registros JSON/YAML) -> valor por defecto
+    base = GanaderiaConfig()
+    trozo = trozo.fillna({col: getattr(base, col) for col in trozo.columns if hasattr(base, col)})
+    resultados = simular_lote(trozo, years)
+
+    if not resumen:
+        columnas = {"Escenario": np.repeat(ids, years)}
+        for col in COLUMNAS_RESULTADO:
+            columnas[col] = resultados[col].reshape(-1)
+        return pd.DataFrame(columnas)
+
+    if "capex_infraestructura" in trozo.columns:
+        capex = trozo["capex_infraestructura"].to_numpy(float)
+    else:
+        capex = np.full(len(trozo), base.capex_infraestructura, dtype=float)
+    flujos = np.column_stack([-capex, resultados["Flujo Neto (Socios)"]])
+    tabla = metricas_lote(flujos, tasa_descuento)
+    tabla.insert(0, "Escenario", ids)
+    tabla.insert(1, "Vientres Final", resultados["Vientres"][:, -1])
+    tabla.insert(2, "Caja Final", resultados["Caja Acumulada (con CAPEX)"][:, -1])
+    return tabla
+
+class _Escritor:
+    # Escribe DataFrames sucesivos en un solo archivo CSV o Parquet sin tenerlos todos en memoria.
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.parquet = os.path.splitext(ruta)[1].lower() == ".parquet"
+        self.escritor_parquet = None
+        self.filas = 0
+        if not self.parquet and os.path.exists(ruta):
+            os.remove(ruta)
+
+    def escribir(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+            if self.escritor_parquet is None:
+                self.escritor_parquet = pq.ParquetWriter(self.ruta, tabla.schema)
+            # Todos los trozos con el esquema del primero (p. ej. ids int vs float entre trozos)
+            self.escritor_parquet.write_table(tabla.cast(self.escritor_parquet.schema))
+        else:
+            df.to_csv(self.ruta, mode="a", header=self.filas == 0, index=False)
+        self.filas += len(df)
+
+    def cerrar(self):
+        if self.escritor_parquet is not None:
+            self.escritor_parquet.close()
+
+def correr_archivo(entrada, salida, years=10, procesos=1, resumen=False, tasa_descuento=0.10,
+                   tamano_trozo=TROZO_CLI):
+    # Corre todo el archivo y devuelve (escenarios, filas escritas).
+    escritor = _Escritor(salida)
+    escenarios = 0
+    try:
+        if procesos <= 1:
+            for trozo in leer_escenarios(entrada, tamano_trozo):
+                escritor.escribir(correr_trozo(trozo, escenarios, years, resumen, tasa_descuento))
+                escenarios += len(trozo)
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            en_vuelo = deque()
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                for trozo in leer_escenarios(entrada, tamano_trozo):
+                    en_vuelo.append(pool.submit(correr_trozo, trozo, escenarios, years, resumen, tasa_descuento))
+                    escenarios += len(trozo)
+                    if len(en_vuelo) >= 2 * procesos:
+                        escritor.escribir(en_vuelo.popleft().result())
+                while en_vuelo:
+                    escritor.escribir(en_vuelo.popleft().result())
+    finally:
+        escritor.cerrar()
+    return escenarios, escritor.filas
+
+def correr_cartera(entrada, salida, years=30, procesos=1, resumen=False, tasa_descuento=0.10, bolsa_comun=False):
+    # Todo el archivo es una cartera (una fila por finca, con "Finca" y "Año Inicio" opcionales).
+    # Detalle: flujo consolidado por año. Resumen: métricas del grupo ("Cartera") y de cada finca.
+    # Devuelve (fincas, filas escritas, métricas del grupo).
+    from agroven.cartera import simular_cartera
+    fincas = pd.concat(list(leer_escenarios(entrada)), ignore_index=True)
+    cartera = simular_cartera(fincas, years, bolsa_comun, procesos, tasa_descuento)
+    if resumen:
+        grupo = cartera["metricas"].to_frame().T
+        grupo.insert(0, "Finca", "Cartera")
+        grupo.insert(1, "Vientres Final", cartera["consolidado"]["Vientres"].iloc[-1])
+        tabla = pd.concat([grupo, cartera["metricas_fincas"]], ignore_index=True)[cartera["metricas_fincas"].columns]
+    else:
+        tabla = cartera["consolidado"]
+    escritor = _Escritor(salida)
+    try:
+        escritor.escribir(tabla)
+    finally:
+        escritor.cerrar()
+    return len(fincas), escritor.filas, cartera["metricas"]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m agroven",
+                                     description="Corre un archivo de escenarios con el motor por lotes.")
+    parser.add_argument("entrada", help="Escenarios (.csv, .jsonl, .json, .yaml)")
+    parser.add_argument("-o", "--salida", required=True, help="Resultados (.csv o .parquet)")
+    parser.add_argument("--years", type=int, default=10, help="Horizonte en años (10)")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo (núcleos)")
+    parser.add_argument("--resumen", action="store_true", help="Una fila por escenario con TIR, VPN y payback")
+    parser.add_argument("--tasa-descuento", type=float, default=0.10, help="Tasa para el VPN del resumen (0.10)")
+    parser.add_argument("--trozo", type=int, default=TROZO_CLI, help=f"Escenarios por tarea ({TROZO_CLI})")
+    parser.add_argument("--cartera", action="store_true",
+                        help="El archivo es una cartera de fincas: flujo, hato y TIR consolidados")
+    parser.add_argument("--bolsa-comun", action="store_true",
+                        help="Cartera: la reinversión va a la finca de mayor retorno marginal")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    if args.cartera:
+        try:
+            fincas, filas, metricas = correr_cartera(args.entrada, args.salida, args.years, args.procesos,
+                                                     args.resumen, args.tasa_descuento, args.bolsa_comun)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print(f"Cartera de {fincas} fincas -> {filas} filas en {args.salida} "
+              f"(TIR {metricas['TIR']:.2%}, {time.perf_counter() - inicio:.1f} s)", file=sys.stderr)
+        return 0
+    try:
+        escenarios, filas = correr_archivo(args.entrada, args.salida, args.years, args.procesos,
+                                           args.resumen, args.tasa_descuento, args.trozo)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"{escenarios} escenarios -> {filas} filas en {args.salida} "
+          f"({time.perf_counter() - inicio:.1f} s, {args.procesos} procesos)", file=sys.stderr)
+    return 0
@@ -0,0 +1,190 @@
+import numpy as np
+
+from agroven.modelo import GanaderiaConfig
+from agroven.lotes import _tabla_escenarios
+from agroven.resultados import ResultadoSimulacion
+
+# --- MOTOR DE COHORTES (Hato estructurado por edad y paridad) ---
+# Clases de edad en años cumplidos: 0..13 y 14+ (la última clase acumula a las mayores).
+N_EDADES = 15
+N_PARIDADES = 7          # 0 (novilla), 1..5 y 6+ partos
+EDAD_PRIMER_SERVICIO = 2 # Años (equivale al Lag T+2 del modelo agregado)
+EDAD_COMPRA = 3          # Los vientres comprados entran con 3 años y 1 parto
+GESTACION_MESES = 9
+LACTANCIA_MESES = 7      # Parto -> Destete
+
+# Perfil por clase de edad. Los multiplicadores se aplican sobre las tasas de GanaderiaConfig:
+#   fertilidad     x tasa_preñez_iatf / tasa_preñez_toro
+#   riesgo_cria    x mortalidad_cria (según la edad de la madre)
+#   descarte       x descarte_vejez (sobre las preñadas)
+#   mortalidad_vientre: muerte anual de la hembra (absoluta, sin venta)
+#   inicial: distribución por edad de los vientres iniciales (config.vientres_iniciales)
+PERFIL_COHORTES = {
+    "fertilidad":         np.array([0, 0, 0.85, 0.90, 1, 1, 1, 1, 1, 0.95, 0.90, 0.85, 0.80, 0.75, 0.70]),
+    "fertilidad_paridad": np.array([1, 0.85, 1, 1, 1, 1, 1]), # Primíparas re-preñan peor
+    "riesgo_cria":        np.array([1, 1, 1.30, 1.10, 1, 1, 1, 1, 1, 1, 1, 1, 1.10, 1.20, 1.30]),
+    "descarte":           np.array([0, 0, 0, 0, 0, 0, 0, 0.5, 1, 1.5, 2, 3, 4, 6, 10]),
+    "mortalidad_vientre": np.array([0.02, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.01, 0.015, 0.015, 0.02, 0.02, 0.025, 0.03, 0.04]),
+    "inicial":            np.array([0, 0, 0, 0.20, 0.20, 0.20, 0.15, 0.15, 0.10, 0, 0, 0, 0, 0, 0]),
+}
+
+# Perfil sin efecto de la edad: en paso anual reproduce el modelo agregado de simular_proyecto
+# mientras el hato no toque el techo (el modelo agregado descuenta dos veces el exceso sobre la capacidad).
+PERFIL_PLANO = {
+    "fertilidad":         np.array([0, 0] + [1] * (N_EDADES - 2), dtype=float),
+    "fertilidad_paridad": np.ones(N_PARIDADES),
+    "riesgo_cria":        np.ones(N_EDADES),
+    "descarte":           np.ones(N_EDADES),
+    "mortalidad_vientre": np.zeros(N_EDADES),
+    "inicial":            PERFIL_COHORTES["inicial"],
+}
+
+def _vender_exceso(vacias, preñadas, exceso, desde_edad):
+    # Vende `exceso` cabezas por hato (array h,), primero vacías y luego preñadas, de la mayor edad a la menor.
+    # Modifica los arrays en el lugar y devuelve las cabezas vendidas por hato.
+    vendidas = np.zeros(vacias.shape[0])
+    for estado in (vacias, preñadas):
+        orden = estado[:, desde_edad:][:, ::-1] # Vista: mayor edad primero
+        bloque = orden.reshape(estado.shape[0], -1)
+        acumulado_previo = np.cumsum(bloque, axis=1) - bloque
+        quitar = np.clip((exceso - vendidas)[:, np.newaxis] - acumulado_previo, 0, bloque)
+        orden -= quitar.reshape(orden.shape)
+        vendidas += quitar.sum(axis=1)
+    return vendidas
+
+def _avanzar_cohortes(escenarios, years=10, perfil=None, pasos_por_anio=1, mes_servicio=5):
+    # Motor alternativo: cada hato guarda sus hembras en arrays fijos (hato x edad x paridad),
+    # separados en vacías y preñadas, preasignados y actualizados en el lugar.
+    # pasos_por_anio=1: paso anual. pasos_por_anio=12: paso mensual, con servicio en `mes_servicio`,
+    #   parto 9 meses después y destete 7 meses después del parto.
+    # Hay una sola temporada de monta, así que todas las crías de un año nacen en el mismo paso:
+    #   la edad se lleva en años y el hato envejece una vez por año (justo antes del parto).
+    # Devuelve un ResultadoSimulacion (escenario x año) sin redondear.
+    if perfil is None: perfil = PERFIL_COHORTES
+    if pasos_por_anio not in (1, 12):
+        raise ValueError("pasos_por_anio debe ser 1 (anual) o 12 (mensual)")
+    p, h = _tabla_escenarios(escenarios)
+    P = pasos_por_anio
+    servicio_desde = EDAD_PRIMER_SERVICIO
+
+    # Calendario dentro del año (en pasos)
+    paso_servicio = mes_servicio % P
+    paso_parto = (mes_servicio + GESTACION_MESES) % 12 % P
+    paso_destete = (mes_servicio + GESTACION_MESES + LACTANCIA_MESES) % 12 % P
+    paso_envejecer = (paso_parto - 1) % P
+
+    # Tasas por celda (hato x edad x paridad), calculadas una sola vez
+    col = lambda campo: p[campo][:, np.newaxis, np.newaxis]
+    fertilidad = (perfil["fertilidad"][np.newaxis, :, np.newaxis]
+                  * perfil["fertilidad_paridad"][np.newaxis, np.newaxis, :])
+    tasa_iatf = np.clip(col("tasa_preñez_iatf") * fertilidad, 0, 1)
+    tasa_toro = np.clip(col("tasa_preñez_toro") * fertilidad, 0, 1)
+    tasa_descarte = np.clip(col("descarte_vejez") * perfil["descarte"][np.newaxis, :, np.newaxis], 0, 1)
+    supervivencia_cria = 1 - np.clip(col("mortalidad_cria") * perfil["riesgo_cria"][np.newaxis, :, np.newaxis], 0, 1)
+    supervivencia_vientre = (1 - perfil["mortalidad_vientre"]) ** (1 / P)
+    supervivencia_vientre = supervivencia_vientre[np.newaxis, :, np.newaxis]
+
+    # Estado (preasignado): [0] vacías, [1] preñadas; ambas son vistas del mismo bloque.
+    # El envejecimiento escribe en un segundo bloque y se alternan (evita copias por solapamiento).
+    estado, siguiente = np.zeros((2, 2, h, N_EDADES, N_PARIDADES))
+    vacias, preñadas = estado
+    temporal = np.zeros((h, N_EDADES, N_PARIDADES))
+    inicial = perfil["inicial"] / perfil["inicial"].sum()
+    for edad in np.nonzero(inicial)[0]:
+        vacias[:, edad, min(max(edad - EDAD_PRIMER_SERVICIO, 0), N_PARIDADES - 1)] = inicial[edad] * p["vientres_iniciales"]
+    terneros_por_destetar = np.zeros(h)
+    compras_pendientes = np.zeros(h)
+    caja_acumulada = -p["capex_infraestructura"].astype(float)
+
+    salida = ResultadoSimulacion(h, years)
+    machos_vendidos = np.zeros(h)
+
+    for i in range(years):
+        machos_vendidos[:] = 0
+        for paso in range(P):
+            # 1. ENTRADAS Y TECHO (inicio de año)
+            if paso == 0:
+                vacias[:, EDAD_COMPRA, 1] += compras_pendientes
+                vientres = estado[:, :, servicio_desde:].sum(axis=(0, 2, 3))
+                exceso = np.maximum(vientres - p["capacidad_maxima"], 0)
+                if exceso.any():
+                    salida["Ventas Descarte"][:, i] += _vender_exceso(vacias, preñadas, exceso, servicio_desde)
+                salida["Inventario Inicial"][:, i] = vientres - exceso
+
+            # 2. PARTO: las preñadas paren y suben de paridad
+            if paso == paso_parto:
+                np.multiply(preñadas, 1 - col("mortalidad_gestacion"), out=temporal)
+                salida["Nacimientos"][:, i] += temporal.sum(axis=(1, 2))
+                terneros_por_destetar += (temporal * supervivencia_cria).sum(axis=(1, 2))
+                vacias[:, :, 1:] += preñadas[:, :, :-1]
+                vacias[:, :, -1] += preñadas[:, :, -1]
+                preñadas[:] = 0
+
+            # 3. DESTETE: machos a la venta, hembras entran como novillas
+            if paso == paso_destete:
+                machos_vendidos += terneros_por_destetar * 0.5
+                vacias[:, 0, 0] += terneros_por_destetar * 0.5
+                salida["Hembras (Entran en 2 años)"][:, i] += terneros_por_destetar * 0.5
+                terneros_por_destetar[:] = 0
+
+            # 4. SERVICIO Y DESCARTE (IATF + repaso con toro; vacías fuera salvo en el Año 1)
+            if paso == paso_servicio:
+                servidas = vacias[:, servicio_desde:]
+                preñez_iatf = servidas * tasa_iatf[:, servicio_desde:]
+                preñez_toro = (servidas - preñez_iatf) * tasa_toro[:, servicio_desde:]
+                nuevas = preñez_iatf + preñez_toro
+                servidas -= nuevas
+                descarte_vejez = nuevas * tasa_descarte[:, servicio_desde:]
+                preñadas[:, servicio_desde:] += nuevas - descarte_vejez
+                vendidas = descarte_vejez.sum(axis=(1, 2))
+                if i > 0:
+                    vendidas += servidas.sum(axis=(1, 2))
+                    servidas[:] = 0
+                salida["Ventas Descarte"][:, i] += vendidas
+
+            # 5. COSTOS DEL PASO (en paso anual, sobre el inventario de apertura como el modelo agregado)
+            if P == 1:
+                vientres = salida["Inventario Inicial"][:, i]
+            else:
+                vientres = estado[:, :, servicio_desde:].sum(axis=(0, 2, 3))
+            salida["Egresos OPEX"][:, i] += (p["costos_fijos"] + (vientres * p["costo_variable_hato"]) + (vientres * p["costo_iatf"])) / P
+
+            # 6. MORTALIDAD DEL PASO y, una vez al año, ENVEJECIMIENTO (la última clase acumula)
+            estado *= supervivencia_vientre
+            if paso == paso_envejecer:
+                siguiente[:, :, 1:] = estado[:, :, :-1]
+                siguiente[:, :, -1] += estado[:, :, -1]
+                siguiente[:, :, 0] = 0
+                estado, siguiente = siguiente, estado
+                vacias, preñadas = estado
+
+        # 7. FINANZAS Y REINVERSIÓN (cierre de año)
+        ingreso_becerros = machos_vendidos * p["peso_destete_macho"] * p["precio_macho_destete"]
+        ingreso_descarte = salida["Ventas Descarte"][:, i] * p["peso_vaca_descarte"] * p["precio_vaca_descarte"]
+        total_ingresos = ingreso_becerros + ingreso_descarte
+        flujo_operativo = total_ingresos - salida["Egresos OPEX"][:, i]
+
+        reinvierte = (flujo_operativo > 0) & (salida["Inventario Inicial"][:, i] < p["capacidad_maxima"])
+        nuevas_compras = np.where(reinvierte, np.trunc(flujo_operativo * p["reinversion_utilidades"] / p["precio_compra_vientre"]), 0.0)
+        dinero_reinvertido = nuevas_compras * p["precio_compra_vientre"]
+        flujo_neto = flujo_operativo - dinero_reinvertido
+        caja_acumulada += flujo_neto
+        compras_pendientes = nuevas_compras
+
+        salida["Compras (Entran sig año)"][:, i] = nuevas_compras
+        salida["Ingresos"][:, i] = total_ingresos
+        salida["Flujo Operativo"][:, i] = flujo_operativo
+        salida["Reinversión (70%)"][:, i] = dinero_reinvertido
+        salida["Flujo Neto (Socios)"][:, i] = flujo_neto
+        salida["Caja Acumulada (con CAPEX)"][:, i] = caja_acumulada
+
+    return salida
+
+def simular_cohortes_lote(escenarios, years=10, perfil=None, pasos_por_anio=1, mes_servicio=5):
+    # Mismas columnas y redondeos que simular_lote (escenario x año), con el motor de cohortes.
+    return _avanzar_cohortes(escenarios, years, perfil, pasos_por_anio, mes_servicio).formatear()
+
+def simular_cohortes(years=10, config=None, perfil=None, pasos_por_anio=1, mes_servicio=5):
+    # Igual que simular_proyecto (mismo DataFrame), pero con el motor de cohortes.
+    if config is None: config = GanaderiaConfig()
+    return _avanzar_cohortes(config, years, perfil, pasos_por_anio, mes_servicio).presentar()
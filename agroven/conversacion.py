@@ -0,0 +1,96 @@
+# --- CONVERSACIÓN: HISTORIAL CON PRESUPUESTO Y CACHÉ DE RESPUESTAS ---
+# El modelo recibe las últimas vueltas de la conversación (no sólo la última pregunta), recortadas
+# para que historial + contexto técnico quepan en un presupuesto de tokens. Las vueltas que no
+# entran se resumen en una línea con las preguntas anteriores.
+# Las respuestas se guardan por pregunta normalizada + huella del contexto técnico y del historial
+# enviados: una pregunta frecuente repetida con los mismos documentos (y la misma conversación previa)
+# se responde localmente, sin llamar al modelo.
+import hashlib
+import re
+import unicodedata
+
+from agroven.cache import CacheLRU, estadisticas_nivel
+
+PRESUPUESTO_TOKENS = 12_000 # system prompt + contexto + historial + pregunta
+MAX_VUELTAS = 6 # Pares pregunta/respuesta como máximo en la ventana
+MAX_TOKENS_MENSAJE = 1_500 # Un mensaje del historial más largo se recorta
+CARACTERES_POR_TOKEN = 4 # Estimación sin tokenizador (texto en español)
+
+def estimar_tokens(texto):
+    return (len(texto) + CARACTERES_POR_TOKEN - 1) // CARACTERES_POR_TOKEN
+
+def _recortar(texto, max_tokens):
+    max_caracteres = max_tokens * CARACTERES_POR_TOKEN
+    if len(texto) <= max_caracteres:
+        return texto
+    return texto[:max_caracteres].rsplit(" ", 1)[0] + " […]"
+
+def ventana_historial(mensajes, system_instruction, pregunta, presupuesto=PRESUPUESTO_TOKENS,
+                      max_vueltas=MAX_VUELTAS):
+    # mensajes: [{"role": "user" | "assistant", "content": str}] anteriores a la pregunta actual.
+    # Devuelve (historial, resumidos): las vueltas más recientes que caben en el presupuesto, en
+    # orden, con rol "user" | "model", y cuántos mensajes viejos quedaron sólo en el resumen.
+    disponible = presupuesto - estimar_tokens(system_instruction) - estimar_tokens(pregunta)
+    recientes = mensajes[-2 * max_vueltas:]
+    elegidos = []
+    for mensaje in reversed(recientes):
+        texto = _recortar(mensaje["content"], MAX_TOKENS_MENSAJE)
+        costo = estimar_tokens(texto)
+        if costo > disponible:
+            break
+        disponible -= costo
+        elegidos.append({"role": "model" if mensaje["role"] == "assistant" else "user", "texto": texto})
+    elegidos.reverse()
+    # El historial empieza siempre con una pregunta del usuario
+    while elegidos and elegidos[0]["role"] != "user":
+        elegidos.pop(0)
+
+    viejos = mensajes[:len(mensajes) - len(elegidos)]
+    preguntas_viejas = [_recortar(m["content"], 20) for m in viejos if m["role"] == "user"]
+    if preguntas_viejas:
+        resumen = "Temas consultados antes en esta conversación: " + "; ".join(preguntas_viejas)
+        while preguntas_viejas and estimar_tokens(resumen) > disponible:
+            preguntas_viejas.pop(0) # Se descartan primero las más antiguas
+            resumen = "Temas consultados antes en esta conversación: " + "; ".join(preguntas_viejas)
+        if preguntas_viejas:
+            elegidos[:0] = [{"role": "user", "texto": resumen},
+                            {"role": "model", "texto": "Entendido."}]
+    return elegidos, len(viejos)
+
+def consulta_recuperacion(mensajes, pregunta):
+    # Texto para buscar en el índice: la pregunta actual más la anterior del usuario, para que
+    # una repregunta corta ("¿y la dosis?") recupere las secciones del tema en curso.
+    anteriores = [m["content"] for m in mensajes if m["role"] == "user"]
+    return (anteriores[-1] + "\n" + pregunta) if anteriores else pregunta
+
+def normalizar_pregunta(pregunta):
+    # Minúsculas, sin acentos ni signos, espacios simples
+    texto = "".join(c for c in unicodedata.normalize("NFKD", pregunta.lower()) if not unicodedata.combining(c))
+    return " ".join(re.findall(r"\w+", texto))
+
+def huella_contexto(system_instruction, modelo, historial=()):
+    # El system prompt ya incluye las secciones recuperadas (que dependen del tema en curso).
+    # historial: la ventana que recibe el modelo (ventana_historial). Una repregunta ("¿y la dosis?")
+    # depende de las vueltas anteriores; sin historial, la misma pregunta acierta entre sesiones.
+    h = hashlib.sha256(f"{modelo}\0{system_instruction}".encode())
+    for mensaje in historial:
+        h.update(f"\0{mensaje['role']}\0{mensaje['texto']}".encode())
+    return h.hexdigest()[:16]
+
+class CacheRespuestas:
+    # LRU de respuestas (compartido por el proceso) con tope de entradas y vencimiento.
+    def __init__(self, max_entradas=500, ttl_segundos=24 * 3600):
+        self.lru = CacheLRU(max_entradas, ttl_segundos)
+
+    def clave(self, pregunta, huella):
+        return f"{huella}|{normalizar_pregunta(pregunta)}"
+
+    def obtener(self, pregunta, huella):
+        return self.lru.obtener(self.clave(pregunta, huella))
+
+    def guardar(self, pregunta, huella, respuesta):
+        if respuesta:
+            self.lru.guardar(self.clave(pregunta, huella), respuesta)
+
+    def estadisticas(self):
+        return estadisticas_nivel(self.lru)
@@ -0,0 +1,142 @@
+import numpy as np
+
+# --- MÉTRICAS FINANCIERAS POR LOTE ---
+# Todas las funciones reciben una matriz de flujos (escenario x año) donde la
+# columna 0 es el Año 0 (CAPEX, normalmente negativo) y las siguientes son los
+# flujos netos anuales. Una fila = un escenario.
+
+# Rango de búsqueda de la TIR (tasa por periodo). Fuera de este rango se marca "Fuera de rango".
+TIR_MINIMA = -0.999
+TIR_MAXIMA = 10.0
+
+# Malla de tasas para localizar cambios de signo del VPN (más densa cerca de 0)
+MALLA_TASAS = np.unique(np.concatenate([
+    np.linspace(TIR_MINIMA, -0.5, 50),
+    np.linspace(-0.5, 1.0, 301),
+    np.geomspace(1.0, TIR_MAXIMA, 60),
+]))
+
+# Estados posibles de la TIR
+TIR_OK = "OK"
+TIR_SIN_CAMBIO_SIGNO = "Sin cambio de signo"
+TIR_FUERA_DE_RANGO = "Fuera de rango"
+TIR_FLUJO_INVALIDO = "Flujo inválido" # Algún flujo NaN o infinito
+
+def _como_matriz(flujos):
+    flujos = np.asarray(flujos, dtype=float)
+    if flujos.ndim == 1:
+        flujos = flujos[np.newaxis, :]
+    return flujos
+
+def _polinomio(flujos, x):
+    # P(x) = sum f_t * x^(T-t) con x = 1 + tasa, evaluado con Horner junto con su derivada.
+    # Para x > 0, signo(P) = signo(VPN) porque P(x) = VPN * x^T.
+    valor = np.zeros(flujos.shape[0])
+    derivada = np.zeros(flujos.shape[0])
+    for t in range(flujos.shape[1]):
+        derivada = derivada * x + valor
+        valor = valor * x + flujos[:, t]
+    return valor, derivada
+
+def tir_lote(flujos, tolerancia=1e-12, iteraciones=100):
+    # TIR de cada fila. Igual que npf.irr, si hay varias raíces se devuelve la más cercana a 0.
+    # 1) Se evalúa el VPN sobre MALLA_TASAS (un producto matricial) para encontrar, a cada lado
+    #    de 0, el tramo con cambio de signo más cercano (el tramo que contiene 0 cuenta en ambos).
+    # 2) Se refinan los dos tramos con Newton acotado (si el paso sale del tramo, bisección) y se
+    #    elige la raíz refinada de menor |tasa|: el borde del tramo no alcanza para decidir.
+    # Devuelve (tir, estado): tir es NaN donde estado != TIR_OK.
+    flujos = _como_matriz(flujos)
+    n, columnas = flujos.shape
+    tir = np.full(n, np.nan)
+    estado = np.full(n, TIR_SIN_CAMBIO_SIGNO, dtype=object)
+
+    # Con un flujo NaN o infinito el VPN no dice nada: esas filas no se buscan (ceros en la malla)
+    invalido = ~np.isfinite(flujos).all(axis=1)
+    estado[invalido] = TIR_FLUJO_INVALIDO
+
+    x_malla = 1 + MALLA_TASAS
+    potencias = x_malla[np.newaxis, :] ** np.arange(columnas - 1, -1, -1)[:, np.newaxis]
+    positivo = (np.where(invalido[:, np.newaxis], 0.0, flujos) @ potencias) >= 0
+    cambio = positivo[:, :-1] != positivo[:, 1:]
+
+    # Filas con raíz fuera de la malla: mismo signo en toda la malla pero no en los extremos teóricos
+    tiene_raiz = cambio.any(axis=1)
+    signo_cero = np.sign(flujos[:, -1])     # VPN cuando tasa -> -1 (domina el último flujo)
+    signo_infinito = np.sign(flujos[:, 0])  # VPN cuando tasa -> infinito (domina el Año 0)
+    fuera = ~tiene_raiz & ~invalido & (signo_cero * signo_infinito < 0)
+    estado[fuera] = TIR_FUERA_DE_RANGO
+    if not tiene_raiz.any():
+        return tir, estado
+
+    # Tramo con cambio de signo más cercano a 0 por arriba y por abajo
+    lo_malla, hi_malla = MALLA_TASAS[:-1], MALLA_TASAS[1:]
+    filas = np.where(tiene_raiz)[0]
+    candidatos = []
+    for lado, distancia in ((hi_malla > 0, np.maximum(lo_malla, 0.0)), (lo_malla < 0, np.maximum(-hi_malla, 0.0))):
+        distancia = np.where(cambio[filas] & lado[np.newaxis, :], distancia[np.newaxis, :], np.inf)
+        tramo = np.argmin(distancia, axis=1)
+        existe = np.isfinite(distancia[np.arange(len(filas)), tramo])
+        candidatos.append((filas[existe], tramo[existe]))
+    filas_c = np.concatenate([c[0] for c in candidatos])
+    tramo = np.concatenate([c[1] for c in candidatos])
+
+    f = flujos[filas_c]
+    lo = 1 + lo_malla[tramo]
+    hi = 1 + hi_malla[tramo]
+    positivo_lo = positivo[filas_c, tramo]
+    x = (lo + hi) / 2
+
+    for _ in range(iteraciones):
+        valor, derivada = _polinomio(f, x)
+        # Achicar el tramo manteniendo el cambio de signo
+        mismo_lado = (valor >= 0) == positivo_lo
+        lo = np.where(mismo_lado, x, lo)
+        hi = np.where(mismo_lado, hi, x)
+        # Paso de Newton; si no es válido o sale del tramo, bisección. Un paso menor que la
+        # tolerancia ya es convergencia aunque apunte fuera (x quedó justo en un borde del tramo).
+        with np.errstate(divide="ignore", invalid="ignore"):
+            paso = valor / derivada
+        x_newton = x - paso
+        fijo = (valor == 0) | (np.abs(paso) <= tolerancia * np.maximum(1.0, np.abs(x)))
+        dentro = np.isfinite(x_newton) & (x_newton > lo) & (x_newton < hi)
+        x_nuevo = np.where(fijo, x, np.where(dentro, x_newton, (lo + hi) / 2))
+        convergido = fijo | (np.abs(x_nuevo - x) <= tolerancia * np.maximum(1.0, np.abs(x)))
+        x = x_nuevo
+        if convergido.all():
+            break
+
+    # Por fila, la raíz de menor |tasa| entre sus (hasta dos) candidatas
+    raiz = x - 1
+    orden = np.lexsort((np.abs(raiz), filas_c))
+    primera = np.ones(len(orden), dtype=bool)
+    primera[1:] = filas_c[orden][1:] != filas_c[orden][:-1]
+    tir[filas_c[orden][primera]] = raiz[orden][primera]
+    estado[filas] = TIR_OK
+    return tir, estado
+
+def vpn_lote(flujos, tasa_descuento):
+    # VPN de cada fila; el Año 0 no se descuenta (misma convención que npf.npv).
+    flujos = _como_matriz(flujos)
+    descuento = (1 + tasa_descuento) ** -np.arange(flujos.shape[1])
+    return flujos @ descuento
+
+def metricas_lote(flujos, tasa_descuento=0.10):
+    # TIR, VPN, año de payback y necesidad máxima de caja para cada fila, en una sola pasada.
+    # "Año Payback" es el primer año con caja acumulada >= 0 (NaN si no se alcanza en el horizonte).
+    # "Necesidad Máxima de Caja" es el peor saldo acumulado (en positivo), incluyendo el CAPEX.
+    import pandas as pd
+    flujos = _como_matriz(flujos)
+    tir, estado = tir_lote(flujos)
+    acumulado = np.cumsum(flujos, axis=1)
+
+    recuperado = acumulado[:, 1:] >= 0
+    alcanza_payback = recuperado.any(axis=1)
+    anio_payback = np.where(alcanza_payback, np.argmax(recuperado, axis=1) + 1.0, np.nan)
+
+    return pd.DataFrame({
+        "TIR": tir,
+        "Estado TIR": estado,
+        "VPN": vpn_lote(flujos, tasa_descuento),
+        "Año Payback": anio_payback,
+        "Necesidad Máxima de Caja": np.maximum(0.0, -acumulado.min(axis=1)),
+    })
@@ -0,0 +1,166 @@
+# --- INGESTA DE DOCUMENTOS (PDF / DOCX / TXT) ---
+# Cada rerun de Streamlit volvía a parsear el adjunto completo. Aquí el texto extraído se guarda
+# por hash de los bytes subidos (memoria del proceso + archivo en disco): un manual de 300 páginas
+# se parsea una vez por archivo, no una vez por interacción.
+# En un fallo de caché las páginas del PDF se extraen por tramos en un pool de procesos y llegan
+# como un flujo ordenado de trozos; el texto se arma con join (sin `+=`) y con topes de páginas,
+# de bytes y de caracteres para acotar la memoria.
+import hashlib
+import io
+import os
+from collections import deque
+
+from agroven.cache import CacheLRU, estadisticas_nivel, guardar_atomico, ruta_cache
+
+MAX_BYTES_ADJUNTO = 50 * 1024 * 1024 # Adjuntos más grandes se rechazan
+MAX_PAGINAS_PDF = 500 # Páginas extraídas como máximo (el resto se ignora)
+MAX_CARACTERES_TEXTO = 2_000_000 # Tope del texto extraído
+PAGINAS_POR_TRAMO = 16 # Páginas por tarea del pool
+# Con menos páginas el pool cuesta más de lo que ahorra. Medido con la etapa extraccion_pdf_umbral
+# del benchmark: cada proceso "spawn" tarda ~1 s en arrancar (importar pypdf y parsear el PDF) y una
+# página ~9 ms en serie, así que el pool recién compensa desde ~160 páginas con 4 núcleos y ~240 con 2.
+MIN_PAGINAS_POOL = 240
+
+CARPETA_TEXTOS = ruta_cache("AGROVEN_TEXTOS", "textos")
+MAX_TEXTOS_GUARDADOS = 50
+
+# Textos extraídos del proceso: huella -> (texto, info)
+_TEXTOS = CacheLRU(max_entradas=16, ttl_segundos=None)
+
+def estadisticas():
+    # Aciertos de la caché de textos en memoria (los aciertos en disco cuentan como fallos aquí)
+    return estadisticas_nivel(_TEXTOS)
+
+def vaciar_cache():
+    # Olvida los textos en memoria (el nivel en disco no se toca)
+    with _TEXTOS.lock:
+        _TEXTOS.entradas.clear()
+
+def huella_bytes(datos, *parametros):
+    # Hash del contenido y de los parámetros de extracción, extensión incluida (sin copiar los bytes)
+    h = hashlib.sha256(datos)
+    h.update(repr(parametros).encode())
+    return h.hexdigest()[:20]
+
+# Lector del PDF dentro de cada proceso del pool: los bytes llegan una sola vez por proceso
+# (initializer) y se parsean una vez; las tareas sólo llevan el tramo de páginas.
+_LECTOR_TRAMOS = None
+
+def _iniciar_tramos(datos):
+    global _LECTOR_TRAMOS
+    from pypdf import PdfReader
+    _LECTOR_TRAMOS = PdfReader(io.BytesIO(datos))
+
+def _extraer_tramo(inicio, fin):
+    # Tarea del pool: texto de las páginas [inicio, fin) del PDF del proceso
+    return [(_LECTOR_TRAMOS.pages[i].extract_text() or "") for i in range(inicio, fin)]
+
+def paginas_pdf(datos, max_paginas=MAX_PAGINAS_PDF, procesos=None):
+    # Devuelve (total de páginas del documento, generador de (numero_pagina, texto) en orden).
+    # El generador se detiene en max_paginas. Con muchas páginas y más de un núcleo los tramos
+    # se reparten en un pool; como máximo hay 2 tramos por proceso en vuelo.
+    from pypdf import PdfReader
+    lector = PdfReader(io.BytesIO(datos))
+    total_documento = len(lector.pages)
+    procesos = procesos or min(os.cpu_count() or 1, 4)
+    return total_documento, _generar_paginas(lector, datos, min(total_documento, max_paginas), procesos)
+
+def _generar_paginas(lector, datos, total, procesos):
+    if procesos <= 1 or total < MIN_PAGINAS_POOL:
+        for i in range(total):
+            yield i + 1, lector.pages[i].extract_text() or ""
+        return
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    tramos = [(inicio, min(inicio + PAGINAS_POR_TRAMO, total)) for inicio in range(0, total, PAGINAS_POR_TRAMO)]
+    en_vuelo = deque()
+    # "spawn": el servidor de Streamlit tiene hilos y hacer fork de un proceso con hilos no es seguro
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_iniciar_tramos, initargs=(datos,)) as pool:
+        for inicio, fin in tramos:
+            en_vuelo.append((inicio, pool.submit(_extraer_tramo, inicio, fin)))
+            if len(en_vuelo) >= 2 * procesos:
+                primera, futuro = en_vuelo.popleft()
+                for j, texto in enumerate(futuro.result()):
+                    yield primera + j + 1, texto
+        while en_vuelo:
+            primera, futuro = en_vuelo.popleft()
+            for j, texto in enumerate(futuro.result()):
+                yield primera + j + 1, texto
+
+def _parrafos_docx(datos):
+    import docx
+    for parrafo in docx.Document(io.BytesIO(datos)).paragraphs:
+        yield parrafo.text
+
+def _juntar(trozos, max_caracteres):
+    # Une los trozos con saltos de línea hasta el tope. Devuelve (texto, cantidad, truncado).
+    partes, largo, cantidad = [], 0, 0
+    for trozo in trozos:
+        if largo + len(trozo) > max_caracteres:
+            partes.append(trozo[:max(max_caracteres - largo, 0)])
+            return "\n".join(partes), cantidad + 1, True
+        partes.append(trozo)
+        largo += len(trozo) + 1
+        cantidad += 1
+    return "\n".join(partes), cantidad, False
+
+def _extraer(extension, datos, max_paginas, max_caracteres, procesos):
+    info = {"paginas": None, "truncado": False}
+    if extension == ".pdf":
+        total, paginas = paginas_pdf(datos, max_paginas, procesos)
+        texto, leidas, truncado = _juntar((t for _, t in paginas), max_caracteres)
+        info.update(paginas=leidas, truncado=truncado or total > max_paginas)
+    elif extension == ".docx":
+        texto, _, truncado = _juntar(_parrafos_docx(datos), max_caracteres)
+        info["truncado"] = truncado
+    elif extension == ".txt":
+        texto = datos.decode("utf-8")
+        info["truncado"] = len(texto) > max_caracteres
+        texto = texto[:max_caracteres]
+    else:
+        raise ValueError(f"Formato no soportado: {extension} (use .pdf, .docx o .txt)")
+    return texto, info
+
+def _guardar_en_disco(ruta, texto, info):
+    def escribir(f):
+        f.write(f"{info['paginas'] or ''}|{int(info['truncado'])}\n")
+        f.write(texto)
+    # Sin disco escribible queda sólo la caché en memoria
+    guardar_atomico(ruta, escribir, "texto_", MAX_TEXTOS_GUARDADOS)
+
+def extraer_texto(nombre, datos, max_paginas=MAX_PAGINAS_PDF, max_caracteres=MAX_CARACTERES_TEXTO,
+                  procesos=None, carpeta=CARPETA_TEXTOS):
+    # Texto de un adjunto (bytes) y un dict info con huella, origen ("memoria" | "disco" | "extraído"),
+    # páginas leídas (PDF) y si se truncó por los topes. carpeta=None desactiva el nivel en disco.
+    if len(datos) > MAX_BYTES_ADJUNTO:
+        raise ValueError(f"El archivo supera el máximo de {MAX_BYTES_ADJUNTO // (1024 * 1024)} MB")
+    # La extensión elige el parser: los mismos bytes como .txt y como .pdf no son el mismo texto
+    extension = os.path.splitext(nombre)[1].lower()
+    huella = huella_bytes(datos, extension, max_paginas, max_caracteres)
+    encontrado, valor = _TEXTOS.obtener(huella)
+    if encontrado:
+        texto, info = valor
+        return texto, dict(info, origen="memoria")
+
+    ruta = os.path.join(carpeta, f"texto_{huella}.txt") if carpeta else None
+    info = None
+    if ruta and os.path.exists(ruta):
+        try:
+            with open(ruta, encoding="utf-8", newline="") as f:
+                cabecera, texto = f.read().split("\n", 1)
+            paginas, truncado = cabecera.split("|")
+            info = {"paginas": int(paginas) if paginas else None, "truncado": truncado == "1"}
+            origen = "disco"
+        except (OSError, ValueError):
+            info = None # Archivo dañado: se extrae de nuevo
+    if info is None:
+        texto, info = _extraer(extension, datos, max_paginas, max_caracteres, procesos)
+        origen = "extraído"
+        if ruta is not None:
+            _guardar_en_disco(ruta, texto, info)
+
+    info["huella"] = huella
+    _TEXTOS.guardar(huella, (texto, info))
+    return texto, dict(info, origen=origen)
@@ -0,0 +1,154 @@
+import numpy as np
+
+from agroven.modelo import GanaderiaConfig
+from agroven.resultados import COLUMNAS_RESULTADO, ResultadoSimulacion, _formatear_lote
+
+# --- MOTOR POR LOTES (Barridos de escenarios) ---
+# Campos de GanaderiaConfig que puede traer cada fila de la tabla de escenarios.
+CAMPOS_CONFIG = list(GanaderiaConfig().campos())
+
+def _tabla_escenarios(escenarios):
+    # Normaliza la entrada a un dict {campo: array de n escenarios}.
+    # Acepta: lista de GanaderiaConfig, DataFrame (una fila por escenario) o dict de arrays/escalares.
+    # Los campos ausentes toman el valor por defecto de GanaderiaConfig("Realista").
+    # Un objeto config suelto se reconoce por descarte (no es lista, tupla ni dict) y se lee por
+    # atributos: sirve cualquier objeto con los campos de GanaderiaConfig, aunque no sea de esa
+    # clase. El DataFrame se reconoce por `columns`, para no tener que importar pandas.
+    if hasattr(escenarios, "columns"):
+        escenarios = {col: escenarios[col].to_numpy() for col in escenarios.columns}
+    elif not isinstance(escenarios, (list, tuple, dict)):
+        escenarios = [escenarios]
+    if isinstance(escenarios, (list, tuple)):
+        escenarios = {campo: [getattr(c, campo) for c in escenarios] for campo in CAMPOS_CONFIG}
+
+    desconocidos = set(escenarios) - set(CAMPOS_CONFIG)
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos en la tabla de escenarios: {sorted(desconocidos)}")
+
+    n = max((np.size(v) for v in escenarios.values() if np.ndim(v) > 0), default=1)
+    base = GanaderiaConfig()
+    tabla = {}
+    for campo in CAMPOS_CONFIG:
+        valor = np.asarray(escenarios.get(campo, getattr(base, campo)), dtype=float)
+        tabla[campo] = np.broadcast_to(valor, (n,)) if valor.ndim == 0 else valor
+    return tabla, n
+
+def _avanzar_lote(parametros, n, years, inicio=None, reinversion=None):
+    # Núcleo vectorizado: cada parámetro es un array (n,) constante en el tiempo
+    # o un array (n, years) con un valor distinto por año (modo Monte Carlo).
+    # inicio: array (n,) de enteros con los años de espera de cada fila antes de arrancar (cartera
+    #   con arranques escalonados). Mientras espera, la fila no produce ni gasta y su CAPEX se paga
+    #   el año en que arranca; sus columnas quedan en cero.
+    # reinversion: función (p, flujo_operativo, vientres_actuales, activo) -> (compras del año, dinero
+    #   reinvertido que paga cada fila), para reemplazar la regla de reinvertir el % de la utilidad
+    #   de cada fila (bolsa común de la cartera: una fila puede pagar vacas que entran en otra).
+    # Devuelve un ResultadoSimulacion (n x years) sin redondear.
+    # Colas de tiempo: hembras nacidas hace 2 y 1 años (Lag T+2)
+    cola_t2 = np.zeros(n)
+    cola_t1 = np.zeros(n)
+
+    iniciales = parametros["vientres_iniciales"]
+    vientres_actuales = np.array(iniciales[:, 0] if iniciales.ndim == 2 else iniciales, dtype=float)
+    preñeces_pendientes = np.zeros(n)
+    compras_pendientes_ingreso = np.zeros(n)
+    escalonado = inicio is not None
+    activo = True
+    caja_acumulada = np.zeros(n) if escalonado else -parametros["capex_infraestructura"]
+
+    salida = ResultadoSimulacion(n, years)
+
+    for i, anio in enumerate(range(1, years + 1)):
+        p = {k: (v[:, i] if v.ndim == 2 else v) for k, v in parametros.items()}
+
+        # 1. INVENTARIO (Compras T+1 y hembras T+2; en Año 1 no entra nada)
+        hembras_entrada = cola_t2
+        if anio > 1:
+            vientres_actuales = vientres_actuales + (compras_pendientes_ingreso + hembras_entrada)
+
+        if escalonado:
+            # Las filas en espera guardan su hato inicial aparte y trabajan este año con cero cabezas
+            activo = anio > inicio
+            en_espera = np.where(activo, 0.0, vientres_actuales)
+            vientres_actuales = vientres_actuales - en_espera
+            caja_acumulada = caja_acumulada - np.where(anio == inicio + 1, p["capex_infraestructura"], 0.0)
+
+        # Techo de carga: el exceso se vende como descarte este año
+        sobre_techo = vientres_actuales > p["capacidad_maxima"]
+        exceso_inventario = np.where(sobre_techo, vientres_actuales - p["capacidad_maxima"], 0.0)
+        vientres_actuales = np.where(sobre_techo, p["capacidad_maxima"], vientres_actuales)
+
+        # 2. BIOLOGÍA
+        nacimientos_totales = preñeces_pendientes * (1 - p["mortalidad_gestacion"])
+        destetados = nacimientos_totales * (1 - p["mortalidad_cria"])
+        machos_venta = destetados * 0.5
+        hembras_reserva = destetados * 0.5
+        cola_t2, cola_t1 = cola_t1, hembras_reserva
+
+        preñez_iatf = vientres_actuales * p["tasa_preñez_iatf"]
+        vacas_repaso = vientres_actuales - preñez_iatf
+        preñez_toro = vacas_repaso * p["tasa_preñez_toro"]
+        total_preñeces_nuevas = preñez_iatf + preñez_toro
+        vacas_vacias = vientres_actuales - total_preñeces_nuevas
+
+        # 3. DESCARTE (Gracia de vacías en Año 1)
+        if escalonado:
+            descarte_vacias = np.where(anio == inicio + 1, 0.0, vacas_vacias)
+        else:
+            descarte_vacias = np.zeros(n) if anio == 1 else vacas_vacias
+        descarte_vejez = total_preñeces_nuevas * p["descarte_vejez"]
+        total_descarte_cabezas = descarte_vacias + descarte_vejez + exceso_inventario
+        preñeces_pendientes = total_preñeces_nuevas - descarte_vejez
+        vientres_proximo_inicio = vientres_actuales - total_descarte_cabezas
+
+        # 4. FINANZAS
+        ingreso_becerros = machos_venta * p["peso_destete_macho"] * p["precio_macho_destete"]
+        ingreso_descarte = total_descarte_cabezas * p["peso_vaca_descarte"] * p["precio_vaca_descarte"]
+        total_ingresos = ingreso_becerros + ingreso_descarte
+        costos_fijos = np.where(activo, p["costos_fijos"], 0.0) if escalonado else p["costos_fijos"]
+        egresos_operativos = costos_fijos + (vientres_actuales * p["costo_variable_hato"]) + (vientres_actuales * p["costo_iatf"])
+        flujo_operativo = total_ingresos - egresos_operativos
+
+        # 5. REINVERSIÓN (compras enteras, sólo con flujo positivo y bajo el techo)
+        if reinversion is None:
+            reinvierte = (flujo_operativo > 0) & (vientres_actuales < p["capacidad_maxima"])
+            potencial_inversion = flujo_operativo * p["reinversion_utilidades"]
+            nuevas_compras = np.where(reinvierte, np.trunc(potencial_inversion / p["precio_compra_vientre"]), 0.0)
+            dinero_reinvertido = np.where(reinvierte, nuevas_compras * p["precio_compra_vientre"], 0.0)
+        else:
+            nuevas_compras, dinero_reinvertido = reinversion(p, flujo_operativo, vientres_actuales, activo)
+
+        flujo_neto = flujo_operativo - dinero_reinvertido
+        caja_acumulada = caja_acumulada + flujo_neto
+        compras_pendientes_ingreso = nuevas_compras
+
+        salida["Inventario Inicial"][:, i] = vientres_actuales
+        salida["Nacimientos"][:, i] = nacimientos_totales
+        salida["Ventas Descarte"][:, i] = total_descarte_cabezas
+        salida["Compras (Entran sig año)"][:, i] = nuevas_compras
+        salida["Hembras (Entran en 2 años)"][:, i] = hembras_reserva
+        salida["Ingresos"][:, i] = total_ingresos
+        salida["Egresos OPEX"][:, i] = egresos_operativos
+        salida["Flujo Operativo"][:, i] = flujo_operativo
+        salida["Reinversión (70%)"][:, i] = dinero_reinvertido
+        salida["Flujo Neto (Socios)"][:, i] = flujo_neto
+        salida["Caja Acumulada (con CAPEX)"][:, i] = caja_acumulada
+
+        vientres_actuales = vientres_proximo_inicio + en_espera if escalonado else vientres_proximo_inicio
+
+    return salida
+
+def simular_lote(escenarios, years=10):
+    # Versión vectorizada de simular_proyecto: avanza todos los escenarios a la vez, año por año.
+    # Devuelve un dict {columna: array (escenario x año)} con los mismos nombres de columna
+    # y los mismos redondeos que simular_proyecto, para que cada fila coincida exactamente.
+    parametros, n = _tabla_escenarios(escenarios)
+    return _formatear_lote(_avanzar_lote(parametros, n, years))
+
+def lote_a_dataframe(resultados):
+    # Formato largo (una fila por escenario y año) con las columnas de simular_proyecto.
+    import pandas as pd
+    n, years = resultados["Año"].shape
+    columnas = {"Escenario": np.repeat(np.arange(n), years)}
+    for col in COLUMNAS_RESULTADO:
+        columnas[col] = resultados[col].reshape(-1)
+    return pd.DataFrame(columnas)
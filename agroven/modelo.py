@@ -0,0 +1,193 @@
+import hashlib
+import json
+
+# --- LÓGICA DE NEGOCIO (OBLIGATORIA / ACTUALIZADA) ---
+class GanaderiaConfig:
+    # Inmutable y hasheable: los valores se fijan al construir (preset + sobrescrituras) y para
+    # variar un parámetro se crea otra config con reemplazar(). La `huella` es estable entre
+    # procesos y reinicios, así sirve de clave de caché.
+    def __init__(self, escenario="Realista", **valores):
+        # Económicos
+        self.precio_macho_destete = 2.6
+        self.precio_vaca_descarte = 2.4
+        self.peso_destete_macho = 210
+        self.peso_vaca_descarte = 450
+        self.costo_variable_hato = 100
+        self.costo_iatf = 120
+        self.costos_fijos = 45000
+        self.precio_compra_vientre = 1000
+        self.capex_infraestructura = 120000
+        
+        # Biológicos
+        self.tasa_preñez_iatf = 0.50
+        self.tasa_preñez_toro = 0.50
+        self.mortalidad_gestacion = 0.05 # Mermas pre-parto
+        self.mortalidad_cria = 0.04      # Muerte nacimiento a destete
+        self.descarte_vejez = 0.03       # 3% de las preñadas se van por viejas
+        
+        # Estratégicos
+        self.reinversion_utilidades = 0.70
+        self.capacidad_maxima = 1500
+        self.vientres_iniciales = 500    # Hato con el que arranca el proyecto
+        
+        if escenario == "Pesimista":
+            self.precio_macho_destete *= 0.85
+            self.tasa_preñez_iatf *= 0.85
+
+        # Sobrescrituras explícitas (p. ej. los diales del dashboard), después del preset
+        desconocidos = set(valores) - set(vars(self))
+        if desconocidos:
+            raise ValueError(f"Campos desconocidos en GanaderiaConfig: {sorted(desconocidos)}")
+        vars(self).update(valores)
+
+        # Desde aquí la config queda congelada (ver __setattr__)
+        canonico = json.dumps({campo: float(valor) for campo, valor in vars(self).items()}, sort_keys=True)
+        vars(self)["_huella"] = hashlib.sha256(canonico.encode()).hexdigest()[:16]
+
+    def __setattr__(self, campo, valor):
+        if "_huella" in vars(self):
+            raise AttributeError(f"GanaderiaConfig es inmutable: use config.reemplazar({campo}=...)")
+        object.__setattr__(self, campo, valor)
+
+    def __delattr__(self, campo):
+        raise AttributeError("GanaderiaConfig es inmutable")
+
+    @property
+    def huella(self):
+        # Hash de los valores (int y float iguales dan la misma huella: 1500 == 1500.0)
+        return self._huella
+
+    def campos(self):
+        # {campo: valor} sin atributos internos
+        return {campo: valor for campo, valor in vars(self).items() if not campo.startswith("_")}
+
+    def reemplazar(self, **cambios):
+        return GanaderiaConfig(**dict(self.campos(), **cambios))
+
+    def __eq__(self, otra):
+        return isinstance(otra, GanaderiaConfig) and self.huella == otra.huella
+
+    def __hash__(self):
+        return hash(self.huella)
+
+    def __repr__(self):
+        return f"GanaderiaConfig({self.huella})"
+
+def simular_proyecto(years=10, config=None):
+    # DataFrame por año con cabezas truncadas y dinero a 2 decimales (formato de las pestañas).
+    return simular_resultado(years, config).presentar()
+
+def simular_resultado(years=10, config=None):
+    # Mismo modelo que simular_proyecto, pero devuelve el ResultadoSimulacion sin redondear.
+    from agroven.resultados import ResultadoSimulacion # Import diferido: GanaderiaConfig no necesita numpy
+    if config is None: config = GanaderiaConfig()
+    
+    # Inicialización de Colas de Tiempo (Buffers)
+    # Historial de hembras nacidas [Año -2, Año -1] para saber cuántas entran hoy
+    cola_hembras_reposicion = [0, 0] 
+    
+    # Variables de Estado Inicial (Año 0 para arrancar Año 1)
+    vientres_actuales = config.vientres_iniciales
+    preñeces_pendientes = 0 # Asumimos año 1 arranca sin preñeces previas o se preñan en el año
+    compras_pendientes_ingreso = 0
+    caja_acumulada = -config.capex_infraestructura
+    
+    resultado = ResultadoSimulacion(1, years)
+    datos = resultado.datos[:, 0, :] # (columna x año), en el orden de COLUMNAS_RESULTADO
+
+    for anio in range(1, years + 1):
+        # 1. ACTUALIZAR INVENTARIO (Inicio de Año)
+        # Entran las compras pagadas el año anterior
+        # Entran las hembras nacidas hace 2 años (fifo: pop(0))
+        hembras_entrada = cola_hembras_reposicion.pop(0)
+        
+        # El inventario ya fue ajustado por descartes al final del bucle anterior, 
+        # solo sumamos las entradas nuevas.
+        if anio > 1:
+            vientres_actuales += compras_pendientes_ingreso + hembras_entrada
+        
+        # Ajuste de Techo (Si nos pasamos de 1500, vendemos el exceso inmediatamente como descarte)
+        exceso_inventario = 0
+        if vientres_actuales > config.capacidad_maxima:
+            exceso_inventario = vientres_actuales - config.capacidad_maxima
+            vientres_actuales = config.capacidad_maxima
+            # Ese exceso genera ingreso extra por descarte este año
+        
+        # 2. BIOLOGÍA (Ciclo Productivo)
+        # Nacimientos (Vienen de preñeces del año anterior)
+        # NOTA: En Año 1, si no hay preñez previa, nacimientos = 0 (según CSV)
+        nacimientos_totales = preñeces_pendientes * (1 - config.mortalidad_gestacion)
+        destetados = nacimientos_totales * (1 - config.mortalidad_cria)
+        
+        machos_venta = destetados * 0.5
+        hembras_reserva = destetados * 0.5
+        
+        # Agregamos hembras a la cola (entrarán en 2 años)
+        cola_hembras_reposicion.append(hembras_reserva)
+        
+        # Servicio (Preñar las vacas actuales)
+        vacas_iatf = vientres_actuales
+        preñez_iatf = vacas_iatf * config.tasa_preñez_iatf
+        vacas_repaso = vacas_iatf - preñez_iatf
+        preñez_toro = vacas_repaso * config.tasa_preñez_toro
+        total_preñeces_nuevas = preñez_iatf + preñez_toro
+        
+        vacas_vacias = vientres_actuales - total_preñeces_nuevas
+        
+        # 3. POLÍTICA DE DESCARTE (Salidas)
+        # A. Vacas Vacías
+        if anio == 1:
+            descarte_vacias = 0 # Gracia Año 1
+            # Las vacías se quedan para el año siguiente
+        else:
+            descarte_vacias = vacas_vacias # Se van todas
+            
+        # B. Vacas Viejas (Incluso si están preñadas, se descartan por edad/estructura)
+        # Aplicamos % sobre las que quedaron preñadas
+        descarte_vejez = total_preñeces_nuevas * config.descarte_vejez
+        
+        total_descarte_cabezas = descarte_vacias + descarte_vejez + exceso_inventario
+        
+        # Actualizamos preñeces para el año siguiente (quitamos las viejas que vendimos)
+        preñeces_pendientes = total_preñeces_nuevas - descarte_vejez
+        
+        # Actualizamos inventario final (para el loop siguiente)
+        # Nota: Si Año 1 no descarta vacías, siguen en el hato.
+        vientres_proximo_inicio = vientres_actuales - total_descarte_cabezas
+        
+        # 4. FINANZAS
+        ingreso_becerros = machos_venta * config.peso_destete_macho * config.precio_macho_destete
+        ingreso_descarte = total_descarte_cabezas * config.peso_vaca_descarte * config.precio_vaca_descarte
+        total_ingresos = ingreso_becerros + ingreso_descarte
+        
+        egresos_operativos = config.costos_fijos + (vientres_actuales * config.costo_variable_hato) + (vientres_actuales * config.costo_iatf)
+        
+        flujo_operativo = total_ingresos - egresos_operativos
+        
+        # 5. REINVERSIÓN
+        dinero_reinvertido = 0
+        nuevas_compras = 0
+        
+        if flujo_operativo > 0 and vientres_actuales < config.capacidad_maxima:
+            potencial_inversion = flujo_operativo * config.reinversion_utilidades
+            nuevas_compras = int(potencial_inversion / config.precio_compra_vientre)
+            dinero_reinvertido = nuevas_compras * config.precio_compra_vientre
+        
+        flujo_neto = flujo_operativo - dinero_reinvertido
+        caja_acumulada += flujo_neto
+        
+        # Guardar la compra para que entre el año siguiente
+        compras_pendientes_ingreso = nuevas_compras
+        
+        # Inventario reportado (Stock de apertura + Salidas por descarte para visualización correcta de flujos)
+        # Para gráficos de "Vientres", usaremos el inventario que produjo ese año (vientres_actuales)
+        
+        datos[:, anio - 1] = (anio, vientres_actuales, vientres_actuales, nacimientos_totales,
+                              total_descarte_cabezas, nuevas_compras, hembras_reserva, total_ingresos,
+                              egresos_operativos, flujo_operativo, dinero_reinvertido, flujo_neto,
+                              caja_acumulada)
+
+        # Solo actualizamos la variable de iteracion AL FINAL
+        vientres_actuales = vientres_proximo_inicio 
+
+    return resultado
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from agroven.modelo import GanaderiaConfig
+from agroven.lotes import CAMPOS_CONFIG, simular_lote
+from agroven.finanzas import metricas_lote, TIR_OK
+
+# --- OPTIMIZADOR (Búsqueda sin derivadas) ---
+# Campos que sólo admiten valores enteros (cabezas)
+CAMPOS_ENTEROS = ["capacidad_maxima"]
+
+# Paso de control de cada variable: los candidatos se redondean a este paso antes de evaluarse,
+# así dos puntos que sólo difieren en decimales sin sentido son la misma política (y la memoria
+# la reutiliza). Campos sin paso definido usan 1/1000 de su rango.
+PASOS_CONTROL = {"reinversion_utilidades": 0.01, "capacidad_maxima": 10, "capex_infraestructura": 1000}
+
+# La restricción de flujo mínimo se mide desde este año: el Año 1 es de gracia (sin destetes ni
+# descarte de vacías) y su flujo negativo no depende de la política.
+ANIO_INICIO_FLUJO_MINIMO = 2
+
+# Objetivos soportados: todos se maximizan (el payback se minimiza como -año)
+OBJETIVOS = ["VPN", "TIR", "Caja Final", "Payback"]
+
+def _evaluar_candidatos(base, variables, candidatos, objetivo, tasa_descuento, years, restricciones):
+    # Corre un lote de candidatos (matriz n x len(variables)) y devuelve (puntaje, factible, metricas).
+    tabla = pd.DataFrame({campo: np.full(len(candidatos), valor, dtype=float) for campo, valor in base.items()})
+    for j, campo in enumerate(variables):
+        tabla[campo] = candidatos[:, j]
+
+    resultados = simular_lote(tabla, years)
+    flujos = np.column_stack([-tabla["capex_infraestructura"].to_numpy(), resultados["Flujo Neto (Socios)"]])
+    metricas = metricas_lote(flujos, tasa_descuento)
+    metricas["Caja Final"] = resultados["Caja Acumulada (con CAPEX)"][:, -1]
+    desde = restricciones.get("flujo_minimo_desde_anio") or ANIO_INICIO_FLUJO_MINIMO
+    metricas["Flujo Mínimo (Socios)"] = resultados["Flujo Neto (Socios)"][:, desde - 1:].min(axis=1)
+
+    factible = np.ones(len(candidatos), dtype=bool)
+    if restricciones.get("flujo_minimo_socios") is not None:
+        factible &= metricas["Flujo Mínimo (Socios)"].to_numpy() >= restricciones["flujo_minimo_socios"]
+    if restricciones.get("capex_maximo") is not None:
+        factible &= tabla["capex_infraestructura"].to_numpy() <= restricciones["capex_maximo"]
+    if restricciones.get("payback_maximo") is not None:
+        factible &= metricas["Año Payback"].to_numpy() <= restricciones["payback_maximo"] # NaN -> no factible
+
+    if objetivo == "VPN":
+        puntaje = metricas["VPN"].to_numpy()
+    elif objetivo == "TIR":
+        puntaje = np.where(metricas["Estado TIR"] == TIR_OK, metricas["TIR"], -np.inf)
+    elif objetivo == "Caja Final":
+        puntaje = metricas["Caja Final"].to_numpy()
+    elif objetivo == "Payback":
+        puntaje = np.nan_to_num(-metricas["Año Payback"].to_numpy(), nan=-np.inf)
+    else:
+        raise ValueError(f"Objetivo no soportado: {objetivo}. Opciones: {OBJETIVOS}")
+    return np.where(factible, puntaje, -np.inf), factible, metricas
+
+def optimizar_politica(config=None, variables=None, objetivo="VPN", restricciones=None,
+                       tasa_descuento=0.10, years=10, iteraciones=8, tamano_lote=200, semilla=0):
+    # Búsqueda aleatoria con caja adaptativa: en cada iteración se evalúa un lote de candidatos
+    # dentro de la caja actual (todos juntos con simular_lote), y la caja se achica a la mitad
+    # alrededor del mejor punto factible. No usa derivadas: el objetivo es escalonado por el
+    # int() de las compras y el techo de capacidad.
+    # variables: {campo: (minimo, maximo)}. restricciones: flujo_minimo_socios (desde el año
+    # flujo_minimo_desde_anio, por defecto ANIO_INICIO_FLUJO_MINIMO), capex_maximo, payback_maximo.
+    # Los candidatos se redondean a PASOS_CONTROL; los repetidos se sirven de una memoria (al
+    # achicarse la caja son cada vez más).
+    if config is None: config = GanaderiaConfig()
+    if variables is None: variables = {"reinversion_utilidades": (0.0, 1.0), "capacidad_maxima": (500, 3000)}
+    if restricciones is None: restricciones = {}
+    desconocidos = set(variables) - set(CAMPOS_CONFIG)
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos para optimizar: {sorted(desconocidos)}")
+
+    campos = list(variables)
+    base = {campo: getattr(config, campo) for campo in CAMPOS_CONFIG}
+    minimos = np.array([variables[c][0] for c in campos], dtype=float)
+    maximos = np.array([variables[c][1] for c in campos], dtype=float)
+    enteros = np.array([c in CAMPOS_ENTEROS for c in campos])
+    pasos = np.array([PASOS_CONTROL.get(c, (variables[c][1] - variables[c][0]) / 1000 or 1.0) for c in campos])
+    pasos[enteros] = np.maximum(np.round(pasos[enteros]), 1)
+    rng = np.random.default_rng(semilla)
+
+    def al_paso(x):
+        # Redondea al paso de control contado desde el mínimo, sin salirse del rango
+        return np.clip(np.round(minimos + np.round((x - minimos) / pasos) * pasos, 9), minimos, maximos)
+
+    memoria = {}
+    mejor_x = al_paso(np.clip([base[c] for c in campos], minimos, maximos).astype(float))
+    mejor_puntaje = -np.inf
+    radio = (maximos - minimos) / 2
+    traza = []
+
+    for iteracion in range(1, iteraciones + 1):
+        inferior = np.maximum(minimos, mejor_x - radio)
+        superior = np.minimum(maximos, mejor_x + radio)
+        candidatos = rng.uniform(inferior, superior, (tamano_lote, len(campos)))
+        candidatos = al_paso(np.vstack([mejor_x, candidatos]))
+
+        claves = [tuple(fila) for fila in candidatos]
+        nuevas = list(dict.fromkeys(k for k in claves if k not in memoria))
+        if nuevas:
+            puntajes, factibles, metricas = _evaluar_candidatos(
+                base, campos, np.array(nuevas), objetivo, tasa_descuento, years, restricciones)
+            for i, clave in enumerate(nuevas):
+                memoria[clave] = (puntajes[i], metricas, i)
+
+        for clave in set(claves):
+            if memoria[clave][0] > mejor_puntaje:
+                mejor_puntaje, mejor_x = memoria[clave][0], np.array(clave)
+
+        traza.append(dict({"Iteración": iteracion, "Evaluados": len(nuevas),
+                           "Reutilizados": len(claves) - len(nuevas), "Mejor Puntaje": mejor_puntaje},
+                          **{campo: mejor_x[j] for j, campo in enumerate(campos)}))
+        radio = radio / 2
+
+    # Si ningún candidato fue factible se reporta el punto de partida
+    _, metricas_mejor, fila_mejor = memoria[tuple(mejor_x)]
+    mejores = {campo: int(mejor_x[j]) if enteros[j] else float(mejor_x[j]) for j, campo in enumerate(campos)}
+    mejor_config = GanaderiaConfig(**dict(base, **mejores))
+
+    return {
+        "mejor_config": mejor_config,
+        "factible": bool(np.isfinite(mejor_puntaje)),
+        "mejor_puntaje": mejor_puntaje,
+        "metricas": metricas_mejor.iloc[fila_mejor],
+        "traza": pd.DataFrame(traza),
+        "evaluaciones": len(memoria),
+    }
@@ -0,0 +1,124 @@
+# --- PERFILADO (Rendimiento) ---
+# Temporizadores y contadores por etapa (simulación, TIR, gráficos, tabla, documentos, modelo...).
+#   perfil = Perfilador(activo=True)
+#   with perfil.etapa("Simulación"):
+#       ...
+#   perfil.tamano("Contexto enviado (caracteres)", len(system_instruction))
+# Apagado, etapa() devuelve siempre el mismo contexto vacío y registrar()/tamano() retornan de
+# inmediato: el costo es una llamada a función por punto instrumentado.
+# Las trazas (una por etapa medida) se exportan como JSON Lines para analizarlas fuera del dashboard.
+import json
+import threading
+import time
+from collections import deque
+
+MAX_TRAZAS = 5000
+
+class _Nulo:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULO = _Nulo()
+
+class _Etapa:
+    __slots__ = ("perfil", "nombre", "datos", "inicio")
+
+    def __init__(self, perfil, nombre, datos):
+        self.perfil = perfil
+        self.nombre = nombre
+        self.datos = datos
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.perfil.registrar(self.nombre, (time.perf_counter() - self.inicio) * 1000, **self.datos)
+        return False
+
+class Perfilador:
+    def __init__(self, activo=False, max_trazas=MAX_TRAZAS):
+        self.activo = activo
+        self.trazas = deque(maxlen=max_trazas)
+        self.tamanos = {} # Último valor de cada tamaño medido
+        self.rerun = 0
+        self.total = 0 # Trazas registradas desde el inicio (las viejas salen del deque)
+        self.exportadas = 0
+        self.lock = threading.Lock()
+
+    def nuevo_rerun(self):
+        if self.activo:
+            self.rerun += 1
+
+    def etapa(self, nombre, **datos):
+        return _Etapa(self, nombre, datos) if self.activo else _NULO
+
+    def registrar(self, nombre, ms=None, **datos):
+        if not self.activo:
+            return
+        traza = {"t": round(time.time(), 3), "rerun": self.rerun, "etapa": nombre}
+        if ms is not None:
+            traza["ms"] = round(ms, 3)
+        traza.update(datos)
+        with self.lock:
+            self.trazas.append(traza)
+            self.total += 1
+
+    def primer_trozo(self, nombre, trozos):
+        # Envuelve un generador y registra cuánto tardó el primer elemento (time-to-first-token)
+        if not self.activo:
+            return trozos
+        return self._medir_primer_trozo(nombre, trozos)
+
+    def _medir_primer_trozo(self, nombre, trozos):
+        inicio = time.perf_counter()
+        primero = True
+        for trozo in trozos:
+            if primero:
+                primero = False
+                self.registrar(nombre, (time.perf_counter() - inicio) * 1000)
+            yield trozo
+
+    def tamano(self, nombre, valor):
+        if not self.activo:
+            return
+        self.tamanos[nombre] = valor
+        self.registrar(nombre, tamano=valor)
+
+    def resumen(self):
+        # Una fila por etapa con tiempos: llamadas, última, promedio y máximo (ms)
+        etapas = {}
+        with self.lock:
+            trazas = list(self.trazas)
+        for traza in trazas:
+            if "ms" not in traza:
+                continue
+            fila = etapas.setdefault(traza["etapa"], {"Etapa": traza["etapa"], "Llamadas": 0, "Total": 0.0, "Máx (ms)": 0.0})
+            fila["Llamadas"] += 1
+            fila["Total"] += traza["ms"]
+            fila["Última (ms)"] = traza["ms"]
+            fila["Máx (ms)"] = max(fila["Máx (ms)"], traza["ms"])
+        filas = []
+        for fila in etapas.values():
+            total = fila.pop("Total")
+            fila["Promedio (ms)"] = round(total / fila["Llamadas"], 3)
+            filas.append(fila)
+        return sorted(filas, key=lambda f: -f["Última (ms)"])
+
+    def a_jsonl(self):
+        with self.lock:
+            return "".join(json.dumps(traza, ensure_ascii=False) + "\n" for traza in self.trazas)
+
+    def exportar_jsonl(self, ruta):
+        # Agrega al archivo las trazas nuevas desde la última exportación; devuelve cuántas escribió
+        with self.lock:
+            nuevas = min(self.total - self.exportadas, len(self.trazas))
+            pendientes = list(self.trazas)[len(self.trazas) - nuevas:]
+            self.exportadas = self.total
+        if pendientes:
+            with open(ruta, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(traza, ensure_ascii=False) + "\n" for traza in pendientes)
+        return len(pendientes)
@@ -0,0 +1,206 @@
+# --- RECUPERACIÓN DE CONTEXTO (BM25) ---
+# En lugar de pegar todo el Cerebro y los adjuntos en el system prompt, se parte el texto por
+# secciones y en cada consulta se envían sólo los `k` fragmentos más relevantes (BM25).
+# El índice se guarda en disco como JSON, identificado por el hash del texto fuente: sólo se
+# reconstruye cuando cambia el texto. Todo es local (sin red ni dependencias extra).
+import hashlib
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+from agroven.cache import guardar_atomico, ruta_cache
+
+VERSION_INDICE = 1 # Subir si cambia la fragmentación o la tokenización (invalida los índices guardados)
+TOP_K = 5
+MAX_CARACTERES_FRAGMENTO = 2500
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+CARPETA_INDICES = ruta_cache("AGROVEN_INDICES", "indices")
+MAX_INDICES_GUARDADOS = 20
+
+# Encabezados que abren un fragmento: "FUENTE: ...", capítulos "II. ..." y secciones "2.1. ..."
+# (las listas "1. ..." dentro de una sección no cortan el fragmento)
+_FUENTE = re.compile(r"^FUENTE:\s*(.+)$")
+_CAPITULO = re.compile(r"^[IVXL]+\.\s+\S")
+_SECCION = re.compile(r"^\d+\.\d+\.?\s+\S")
+
+_STOPWORDS = set("""
+a al algo ante antes como con contra cual cuales cuando de del desde donde durante e el ella ellas ellos
+en entre era es esa ese eso esta este esto estos estas fue ha han hay la las le les lo los mas me mi muy
+ni no nos o os para pero por porque que quien se sea ser si sin sobre son su sus tambien te tiene tu un
+una uno unos unas y ya cuanto cuanta cuantos cuantas cual debo debe deben puedo puede hacer hago
+""".split())
+
+def _sin_acentos(texto):
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+def tokenizar(texto):
+    # Minúsculas, sin acentos ni stopwords; plural simple (-es/-s) recortado para palabras largas.
+    tokens = []
+    for palabra in re.findall(r"\w+", _sin_acentos(texto.lower())):
+        if palabra in _STOPWORDS or len(palabra) < 2:
+            continue
+        if len(palabra) > 5 and palabra.endswith("es"):
+            palabra = palabra[:-2]
+        elif len(palabra) > 4 and palabra.endswith("s"):
+            palabra = palabra[:-1]
+        tokens.append(palabra)
+    return tokens
+
+def _partir_largo(lineas, max_caracteres):
+    # Parte una sección demasiado larga en bloques de líneas completas
+    bloques, actual, largo = [], [], 0
+    for linea in lineas:
+        if actual and largo + len(linea) > max_caracteres:
+            bloques.append(actual)
+            actual, largo = [], 0
+        actual.append(linea)
+        largo += len(linea) + 1
+    if actual:
+        bloques.append(actual)
+    return bloques
+
+def fragmentar(texto, fuente="Documento", max_caracteres=MAX_CARACTERES_FRAGMENTO):
+    # Lista de fragmentos {"fuente", "titulo", "texto"} cortados por encabezados.
+    # Un texto sin encabezados (p. ej. un PDF adjunto) se parte sólo por tamaño.
+    fragmentos = []
+    capitulo, titulo, lineas = "", "", []
+
+    def cerrar():
+        if not any(l.strip() for l in lineas):
+            return
+        for i, bloque in enumerate(_partir_largo(lineas, max_caracteres)):
+            nombre = " › ".join(p for p in [capitulo, titulo] if p) or fuente
+            fragmentos.append({"fuente": fuente, "titulo": nombre if i == 0 else f"{nombre} (cont.)",
+                               "texto": "\n".join(bloque).strip()})
+
+    for linea in texto.splitlines():
+        linea = linea.rstrip()
+        encabezado = linea.strip()
+        if encabezado.startswith("====="):
+            continue
+        if _FUENTE.match(encabezado):
+            cerrar()
+            fuente = os.path.splitext(_FUENTE.match(encabezado).group(1).strip())[0]
+            capitulo, titulo, lineas = "", "", []
+        elif _CAPITULO.match(encabezado):
+            cerrar()
+            capitulo, titulo, lineas = encabezado, "", [linea]
+        elif _SECCION.match(encabezado):
+            cerrar()
+            titulo, lineas = encabezado, [linea]
+        else:
+            lineas.append(linea)
+    cerrar()
+    return fragmentos
+
+def huella_textos(textos):
+    # textos: {fuente: texto}. Hash estable del contenido y de la versión del índice.
+    h = hashlib.sha256(f"v{VERSION_INDICE}|{MAX_CARACTERES_FRAGMENTO}".encode())
+    for fuente in sorted(textos):
+        h.update(fuente.encode() + b"\0" + textos[fuente].encode() + b"\0")
+    return h.hexdigest()[:16]
+
+class IndiceBM25:
+    # Índice invertido en memoria: término -> (fragmentos, frecuencias). buscar() suma los aportes
+    # BM25 de los términos de la consulta sobre un vector de puntajes (uno por fragmento).
+    def __init__(self, fragmentos, huella=None, k1=BM25_K1, b=BM25_B):
+        self.fragmentos = fragmentos
+        self.huella = huella
+        self.k1 = k1
+        self.b = b
+        listas = {}
+        longitudes = []
+        for i, fragmento in enumerate(fragmentos):
+            frecuencias = Counter(tokenizar(fragmento["titulo"] + "\n" + fragmento["texto"]))
+            longitudes.append(sum(frecuencias.values()))
+            for termino, tf in frecuencias.items():
+                listas.setdefault(termino, ([], []))
+                listas[termino][0].append(i)
+                listas[termino][1].append(tf)
+        self._preparar(listas, longitudes)
+
+    def _preparar(self, listas, longitudes):
+        self.longitudes = np.asarray(longitudes, dtype=float)
+        self.postings = {t: (np.asarray(d, dtype=np.int32), np.asarray(f, dtype=float)) for t, (d, f) in listas.items()}
+        n = len(self.fragmentos)
+        promedio = self.longitudes.mean() if n else 1.0
+        self.normalizacion = self.k1 * (1 - self.b + self.b * self.longitudes / max(promedio, 1e-9))
+        self.idf = {t: math.log(1 + (n - len(d) + 0.5) / (len(d) + 0.5)) for t, (d, _) in self.postings.items()}
+
+    def buscar(self, consulta, k=TOP_K):
+        # Devuelve [(puntaje, fragmento)] de mayor a menor, sólo fragmentos con algún término en común.
+        puntajes = np.zeros(len(self.fragmentos))
+        for termino, veces in Counter(tokenizar(consulta)).items():
+            if termino not in self.postings:
+                continue
+            docs, tf = self.postings[termino]
+            puntajes[docs] += veces * self.idf[termino] * tf * (self.k1 + 1) / (tf + self.normalizacion[docs])
+        candidatos = np.nonzero(puntajes)[0]
+        if candidatos.size > k:
+            candidatos = candidatos[np.argpartition(-puntajes[candidatos], k)[:k]]
+        orden = candidatos[np.argsort(-puntajes[candidatos], kind="stable")]
+        return [(float(puntajes[i]), self.fragmentos[i]) for i in orden]
+
+    def a_dict(self):
+        return {"version": VERSION_INDICE, "huella": self.huella, "k1": self.k1, "b": self.b,
+                "fragmentos": self.fragmentos, "longitudes": self.longitudes.tolist(),
+                "postings": {t: [d.tolist(), f.tolist()] for t, (d, f) in self.postings.items()}}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        indice = cls.__new__(cls)
+        indice.fragmentos = datos["fragmentos"]
+        indice.huella = datos["huella"]
+        indice.k1 = datos["k1"]
+        indice.b = datos["b"]
+        indice._preparar({t: tuple(v) for t, v in datos["postings"].items()}, datos["longitudes"])
+        return indice
+
+    def __len__(self):
+        return len(self.fragmentos)
+
+def cargar_o_construir(textos, carpeta=CARPETA_INDICES):
+    # Índice BM25 para {fuente: texto}. Si ya existe en disco un índice con la misma huella se
+    # carga; si no, se construye y se guarda. Devuelve (indice, "disco" | "construido").
+    huella = huella_textos(textos)
+    ruta = os.path.join(carpeta, f"indice_{huella}.json")
+    if os.path.exists(ruta):
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                datos = json.load(f)
+            if datos.get("version") == VERSION_INDICE and datos.get("huella") == huella:
+                return IndiceBM25.desde_dict(datos), "disco"
+        except (OSError, ValueError, KeyError):
+            pass # Archivo dañado: se reconstruye
+
+    fragmentos = [fragmento for fuente, texto in textos.items() for fragmento in fragmentar(texto, fuente)]
+    indice = IndiceBM25(fragmentos, huella)
+    # Sin disco escribible el índice sigue sirviendo en memoria
+    guardar_atomico(ruta, lambda f: json.dump(indice.a_dict(), f, ensure_ascii=False), "indice_", MAX_INDICES_GUARDADOS)
+    return indice, "construido"
+
+def armar_contexto(resultados):
+    # Bloque de documentación para el system prompt con los fragmentos recuperados
+    if not resultados:
+        return ""
+    partes = [f"[{fragmento['fuente']} › {fragmento['titulo']}]\n{fragmento['texto']}" for _, fragmento in resultados]
+    return "\n\n--- DOCUMENTACIÓN TÉCNICA Y CONTEXTO ---\n" + "\n\n".join(partes) + "\n---------------------------------------"
+
+def respuesta_local(pregunta, resultados, max_caracteres=600):
+    # Respuesta extractiva sin modelo: sirve sin conexión y como sustituto en pruebas.
+    if not resultados:
+        return "No encontré información sobre esa consulta en la documentación técnica cargada."
+    lineas = [f"Según la documentación técnica ({len(resultados)} secciones relevantes):"]
+    for _, fragmento in resultados[:3]:
+        texto = fragmento["texto"]
+        if len(texto) > max_caracteres:
+            texto = texto[:max_caracteres].rsplit(" ", 1)[0] + "…"
+        lineas.append(f"\n**{fragmento['titulo']}** ({fragmento['fuente']})\n\n{texto}")
+    return "\n".join(lineas)
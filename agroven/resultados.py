@@ -0,0 +1,83 @@
+import numpy as np
+
+# --- RESULTADOS EN COLUMNAS ---
+# Columnas (y orden) del DataFrame que devuelve simular_proyecto
+COLUMNAS_RESULTADO = ["Año", "Inventario Inicial", "Vientres", "Nacimientos", "Ventas Descarte",
+                      "Compras (Entran sig año)", "Hembras (Entran en 2 años)", "Ingresos",
+                      "Egresos OPEX", "Flujo Operativo", "Reinversión (70%)",
+                      "Flujo Neto (Socios)", "Caja Acumulada (con CAPEX)"]
+
+# Al presentar: las cabezas se truncan con int() y el dinero se redondea a 2 decimales
+COLUMNAS_CABEZAS = ["Inventario Inicial", "Nacimientos", "Ventas Descarte",
+                    "Compras (Entran sig año)", "Hembras (Entran en 2 años)"]
+COLUMNAS_DINERO = ["Ingresos", "Egresos OPEX", "Flujo Operativo", "Reinversión (70%)",
+                   "Flujo Neto (Socios)", "Caja Acumulada (con CAPEX)"]
+
+_INDICE = {col: j for j, col in enumerate(COLUMNAS_RESULTADO)}
+
+def _redondear(valores, decimales=2):
+    # np.round escala por 10^decimales y puede diferir de round() de Python en los empates
+    # (p. ej. 220471.065). Los casos dudosos se resuelven con round() para coincidir exactamente.
+    redondeado = np.round(valores, decimales)
+    escalado = valores * 10.0 ** decimales
+    dudosos = np.abs(np.abs(escalado - np.trunc(escalado)) - 0.5) < 1e-6
+    if dudosos.any():
+        redondeado[dudosos] = [round(v, decimales) for v in valores[dudosos].tolist()]
+    return redondeado
+
+def _formatear_lote(salida):
+    # Mismo formato de salida que simular_proyecto (int() trunca, round() a 2 decimales).
+    # `salida` es un ResultadoSimulacion o un dict {columna: array (escenario x año)} sin redondear.
+    n, years = salida["Inventario Inicial"].shape
+    resultados = {"Año": np.broadcast_to(np.arange(1, years + 1), (n, years))}
+    for col in COLUMNAS_CABEZAS:
+        resultados[col] = np.trunc(salida[col]).astype(np.int64)
+    resultados["Vientres"] = resultados["Inventario Inicial"]
+    for col in COLUMNAS_DINERO:
+        resultados[col] = _redondear(salida[col], 2)
+    return resultados
+
+def presentar(salida, escenario=0):
+    # DataFrame de un escenario con el formato de simular_proyecto (borde de presentación).
+    import pandas as pd
+    resultados = _formatear_lote(salida)
+    return pd.DataFrame({col: resultados[col][escenario] for col in COLUMNAS_RESULTADO})
+
+class ResultadoSimulacion:
+    # Resultados sin redondear en un solo bloque float64 preasignado (columna x escenario x año).
+    # r["Flujo Neto (Socios)"] es una vista (escenario x año) sobre el bloque: los motores escriben
+    # año a año en el lugar y las cabezas quedan fraccionarias hasta presentar.
+    # "Vientres" es alias de "Inventario Inicial" y se sincroniza al exportar.
+    def __init__(self, n=1, years=10):
+        self.n = n
+        self.years = years
+        self.datos = np.zeros((len(COLUMNAS_RESULTADO), n, years))
+        self.datos[_INDICE["Año"]] = np.arange(1, years + 1)
+
+    def __getitem__(self, columna):
+        return self.datos[_INDICE[columna]]
+
+    def __setitem__(self, columna, valores):
+        self.datos[_INDICE[columna]] = valores
+
+    def __contains__(self, columna):
+        return columna in _INDICE
+
+    def keys(self):
+        return list(COLUMNAS_RESULTADO)
+
+    def __len__(self):
+        return self.n
+
+    def a_pandas(self, escenario=0):
+        # Valores crudos de un escenario sin copiar: el DataFrame comparte memoria con `datos`.
+        import pandas as pd
+        self.datos[_INDICE["Vientres"]] = self.datos[_INDICE["Inventario Inicial"]]
+        return pd.DataFrame(self.datos[:, escenario, :].T, columns=COLUMNAS_RESULTADO, copy=False)
+
+    def formatear(self):
+        # {columna: array (escenario x año)} redondeado, igual que simular_lote
+        return _formatear_lote(self)
+
+    def presentar(self, escenario=0):
+        return presentar(self, escenario)
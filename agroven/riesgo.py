@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from agroven.modelo import GanaderiaConfig
+from agroven.lotes import CAMPOS_CONFIG, _avanzar_lote, _tabla_escenarios
+from agroven.finanzas import TIR_MAXIMA, tir_lote
+
+# --- MODO RIESGO (Monte Carlo) ---
+# Parámetros que se muestrean por año y por trayectoria.
+PARAMETROS_RIESGO = ["tasa_preñez_iatf", "tasa_preñez_toro", "mortalidad_gestacion",
+                     "mortalidad_cria", "precio_macho_destete", "precio_vaca_descarte"]
+
+# Las tasas se recortan a [0, 1]; los precios sólo a valores no negativos.
+LIMITES_RIESGO = {
+    "tasa_preñez_iatf": (0.0, 1.0),
+    "tasa_preñez_toro": (0.0, 1.0),
+    "mortalidad_gestacion": (0.0, 1.0),
+    "mortalidad_cria": (0.0, 1.0),
+    "precio_macho_destete": (0.0, np.inf),
+    "precio_vaca_descarte": (0.0, np.inf),
+}
+
+TROZO_MONTE_CARLO = 10_000 # Trayectorias por bloque (acota memoria y permite repartir en hilos)
+
+def distribuciones_por_defecto(config, variabilidad=0.10):
+    # Normal centrada en el valor de la config con desvío = variabilidad * valor.
+    return {campo: ("normal", getattr(config, campo), abs(getattr(config, campo)) * variabilidad)
+            for campo in PARAMETROS_RIESGO}
+
+def _muestrear(rng, distribucion, forma):
+    # distribucion: ("normal", media, desvio) | ("uniforme", min, max)
+    #               ("triangular", min, moda, max) | ("lognormal", media, desvio)
+    tipo, *args = distribucion
+    if tipo == "normal":
+        return rng.normal(args[0], args[1], forma)
+    if tipo == "uniforme":
+        return rng.uniform(args[0], args[1], forma)
+    if tipo == "triangular":
+        return rng.triangular(args[0], args[1], args[2], forma)
+    if tipo == "lognormal":
+        # Parametrizada por media y desvío de la variable (no del logaritmo)
+        media, desvio = args
+        sigma2 = np.log1p((desvio / media) ** 2)
+        return rng.lognormal(np.log(media) - sigma2 / 2, np.sqrt(sigma2), forma)
+    raise ValueError(f"Distribución no soportada: {tipo}")
+
+def _trozo_monte_carlo(config, distribuciones, years, n, semilla):
+    rng = np.random.default_rng(semilla)
+    parametros, _ = _tabla_escenarios(config)
+    parametros = {k: np.broadcast_to(v, (n,)) for k, v in parametros.items()}
+    for campo, distribucion in distribuciones.items():
+        minimo, maximo = LIMITES_RIESGO.get(campo, (-np.inf, np.inf))
+        parametros[campo] = np.clip(_muestrear(rng, distribucion, (n, years)), minimo, maximo)
+
+    salida = _avanzar_lote(parametros, n, years)
+    flujos = np.column_stack([-parametros["capex_infraestructura"], salida["Flujo Neto (Socios)"]])
+    tir, _ = tir_lote(flujos)
+    sin_tir = np.isnan(tir)
+    # Sin TIR no es un caso a descartar: casi siempre es la trayectoria que nunca recupera el CAPEX.
+    # Entra en los percentiles como -100% (pérdida total) si pierde dinero a tasa 0, o con el tope
+    # de la malla si su TIR queda por encima de TIR_MAXIMA.
+    tir[sin_tir] = np.where(flujos[sin_tir].sum(axis=1) < 0, -1.0, TIR_MAXIMA)
+    return salida["Caja Acumulada (con CAPEX)"], np.trunc(salida["Inventario Inicial"]), tir, sin_tir
+
+def simular_monte_carlo(config=None, distribuciones=None, years=10, trayectorias=10_000,
+                        semilla=None, hilos=1):
+    # Corre `trayectorias` caminos aleatorios en bloques vectorizados y resume en bandas P5/P50/P95.
+    # Las bandas de TIR incluyen las trayectorias sin TIR (ver _trozo_monte_carlo); su proporción
+    # se informa aparte en "prob_sin_tir".
+    # Cada bloque tiene su propia semilla derivada de `semilla`, así el resultado no depende de `hilos`.
+    if config is None: config = GanaderiaConfig()
+    if distribuciones is None: distribuciones = distribuciones_por_defecto(config)
+    desconocidos = set(distribuciones) - set(CAMPOS_CONFIG)
+    if desconocidos:
+        raise ValueError(f"Parámetros desconocidos en las distribuciones: {sorted(desconocidos)}")
+
+    tamanos = [min(TROZO_MONTE_CARLO, trayectorias - i) for i in range(0, trayectorias, TROZO_MONTE_CARLO)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    tareas = [(config, distribuciones, years, n, s) for n, s in zip(tamanos, semillas)]
+
+    if hilos > 1:
+        # NumPy libera el GIL en las operaciones vectorizadas, así que los hilos escalan en varios núcleos
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            trozos = list(pool.map(lambda args: _trozo_monte_carlo(*args), tareas))
+    else:
+        trozos = [_trozo_monte_carlo(*args) for args in tareas]
+
+    caja = np.concatenate([t[0] for t in trozos])
+    vientres = np.concatenate([t[1] for t in trozos])
+    tir = np.concatenate([t[2] for t in trozos])
+    sin_tir = np.concatenate([t[3] for t in trozos])
+
+    bandas = pd.DataFrame({"Año": np.arange(1, years + 1)})
+    for nombre, matriz in [("Caja Acumulada (con CAPEX)", caja), ("Vientres", vientres)]:
+        p5, p50, p95 = np.percentile(matriz, [5, 50, 95], axis=0)
+        bandas[f"{nombre} P5"] = p5
+        bandas[f"{nombre} P50"] = p50
+        bandas[f"{nombre} P95"] = p95
+
+    tir_p5, tir_p50, tir_p95 = np.percentile(tir, [5, 50, 95])
+
+    return {
+        "bandas": bandas,
+        "tir": {"P5": tir_p5, "P50": tir_p50, "P95": tir_p95},
+        "prob_sin_tir": float(sin_tir.mean()),
+        "prob_sin_payback": float((~(caja >= 0).any(axis=1)).mean()),
+        "trayectorias": trayectorias,
+    }
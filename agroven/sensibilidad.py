@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from agroven.modelo import GanaderiaConfig
+from agroven.lotes import CAMPOS_CONFIG, simular_lote
+from agroven.finanzas import metricas_lote
+
+# --- SENSIBILIDAD (Tornado) ---
+# Parámetros que son fracciones: la perturbación se recorta a [0, 1].
+CAMPOS_FRACCION = ["tasa_preñez_iatf", "tasa_preñez_toro", "mortalidad_gestacion",
+                   "mortalidad_cria", "descarte_vejez", "reinversion_utilidades"]
+
+def analisis_sensibilidad(config=None, years=10, variaciones=(-0.20, -0.10, 0.10, 0.20)):
+    # Perturba cada campo de GanaderiaConfig por cada variación (±X%) y corre todo en un solo lote.
+    # Devuelve (detalle, ranking):
+    #   detalle: una fila por (parámetro, variación) con Caja Final, TIR y Vientres Final.
+    #   ranking: por parámetro, el rango de cada métrica entre la variación mínima y la máxima,
+    #            ordenado de mayor a menor impacto sobre la caja final.
+    if config is None: config = GanaderiaConfig()
+    base = {campo: getattr(config, campo) for campo in CAMPOS_CONFIG}
+
+    filas = [dict(base, **{"Parámetro": "Base", "Variación": 0.0})]
+    for campo in CAMPOS_CONFIG:
+        for variacion in variaciones:
+            valor = base[campo] * (1 + variacion)
+            if campo in CAMPOS_FRACCION:
+                valor = min(max(valor, 0.0), 1.0)
+            filas.append(dict(base, **{campo: valor, "Parámetro": campo, "Variación": variacion}))
+    tabla = pd.DataFrame(filas)
+
+    resultados = simular_lote(tabla[CAMPOS_CONFIG], years)
+    flujos = np.column_stack([-tabla["capex_infraestructura"].to_numpy(), resultados["Flujo Neto (Socios)"]])
+    metricas = metricas_lote(flujos)
+
+    detalle = tabla[["Parámetro", "Variación"]].copy()
+    detalle["Caja Final"] = resultados["Caja Acumulada (con CAPEX)"][:, -1]
+    detalle["TIR"] = metricas["TIR"].to_numpy()
+    detalle["Vientres Final"] = resultados["Vientres"][:, -1]
+
+    valores_base = detalle.iloc[0]
+    extremos = detalle[detalle["Variación"].isin([min(variaciones), max(variaciones)])]
+    ranking = []
+    for campo, grupo in extremos.groupby("Parámetro", sort=False):
+        bajo = grupo.loc[grupo["Variación"].idxmin()]
+        alto = grupo.loc[grupo["Variación"].idxmax()]
+        fila = {"Parámetro": campo}
+        for metrica in ["Caja Final", "TIR", "Vientres Final"]:
+            fila[f"{metrica} (-)"] = bajo[metrica] - valores_base[metrica]
+            fila[f"{metrica} (+)"] = alto[metrica] - valores_base[metrica]
+            fila[f"Rango {metrica}"] = abs(alto[metrica] - bajo[metrica])
+        ranking.append(fila)
+    ranking = pd.DataFrame(ranking).sort_values("Rango Caja Final", ascending=False, ignore_index=True)
+    return detalle, ranking
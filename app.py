@@ -1,170 +1,29 @@
 import streamlit as st
 import os
+import time
 import pandas as pd
-import numpy as np
-import numpy_financial as npf
 import plotly.express as px
 import plotly.graph_objects as go
-from google import genai
-from google.genai import types
-from pypdf import PdfReader
-import docx
+
+from agroven import (GanaderiaConfig, simular_proyecto, simular_cohortes, distribuciones_por_defecto,
+                     simular_monte_carlo, analisis_sensibilidad, optimizar_politica, OBJETIVOS,
+                     ANIO_INICIO_FLUJO_MINIMO, tir_lote, TIR_OK, CacheResultados, simular_cartera)
+from agroven.recuperacion import TOP_K, huella_textos, cargar_o_construir, armar_contexto
+from agroven.asistente import crear_backend
+from agroven.conversacion import CacheRespuestas, ventana_historial, consulta_recuperacion, huella_contexto
+from agroven.ingesta import extraer_texto, estadisticas as estadisticas_textos
+from agroven.perfil import Perfilador
 
 #Set page layout to wide
 st.set_page_config(layout="wide", page_title="Agroven - Simulación Financiera")
+inicio_rerun = time.perf_counter()
 
-# --- LÓGICA DE NEGOCIO (OBLIGATORIA / ACTUALIZADA) ---
-class GanaderiaConfig:
-    def __init__(self, escenario="Realista"):
-        # Económicos
-        self.precio_macho_destete = 2.6
-        self.precio_vaca_descarte = 2.4
-        self.peso_destete_macho = 210
-        self.peso_vaca_descarte = 450
-        self.costo_variable_hato = 100
-        self.costo_iatf = 120
-        self.costos_fijos = 45000
-        self.precio_compra_vientre = 1000
-        self.capex_infraestructura = 120000
-        
-        # Biológicos
-        self.tasa_preñez_iatf = 0.50
-        self.tasa_preñez_toro = 0.50
-        self.mortalidad_gestacion = 0.05 # Mermas pre-parto
-        self.mortalidad_cria = 0.04      # Muerte nacimiento a destete
-        self.descarte_vejez = 0.03       # 3% de las preñadas se van por viejas
-        
-        # Estratégicos
-        self.reinversion_utilidades = 0.70
-        self.capacidad_maxima = 1500
-        
-        if escenario == "Pesimista":
-            self.precio_macho_destete *= 0.85
-            self.tasa_preñez_iatf *= 0.85
-
-def simular_proyecto(years=10, config=None):
-    if config is None: config = GanaderiaConfig()
-    
-    # Inicialización de Colas de Tiempo (Buffers)
-    # Historial de hembras nacidas [Año -2, Año -1] para saber cuántas entran hoy
-    cola_hembras_reposicion = [0, 0] 
-    
-    # Variables de Estado Inicial (Año 0 para arrancar Año 1)
-    vientres_actuales = 500
-    preñeces_pendientes = 0 # Asumimos año 1 arranca sin preñeces previas o se preñan en el año
-    compras_pendientes_ingreso = 0
-    caja_acumulada = -config.capex_infraestructura
-    
-    resultados = []
-
-    for anio in range(1, years + 1):
-        # 1. ACTUALIZAR INVENTARIO (Inicio de Año)
-        # Entran las compras pagadas el año anterior
-        # Entran las hembras nacidas hace 2 años (fifo: pop(0))
-        hembras_entrada = cola_hembras_reposicion.pop(0)
-        
-        # El inventario ya fue ajustado por descartes al final del bucle anterior, 
-        # solo sumamos las entradas nuevas.
-        if anio > 1:
-            vientres_actuales += compras_pendientes_ingreso + hembras_entrada
-        
-        # Ajuste de Techo (Si nos pasamos de 1500, vendemos el exceso inmediatamente como descarte)
-        exceso_inventario = 0
-        if vientres_actuales > config.capacidad_maxima:
-            exceso_inventario = vientres_actuales - config.capacidad_maxima
-            vientres_actuales = config.capacidad_maxima
-            # Ese exceso genera ingreso extra por descarte este año
-        
-        # 2. BIOLOGÍA (Ciclo Productivo)
-        # Nacimientos (Vienen de preñeces del año anterior)
-        # NOTA: En Año 1, si no hay preñez previa, nacimientos = 0 (según CSV)
-        nacimientos_totales = preñeces_pendientes * (1 - config.mortalidad_gestacion)
-        destetados = nacimientos_totales * (1 - config.mortalidad_cria)
-        
-        machos_venta = destetados * 0.5
-        hembras_reserva = destetados * 0.5
-        
-        # Agregamos hembras a la cola (entrarán en 2 años)
-        cola_hembras_reposicion.append(hembras_reserva)
-        
-        # Servicio (Preñar las vacas actuales)
-        vacas_iatf = vientres_actuales
-        preñez_iatf = vacas_iatf * config.tasa_preñez_iatf
-        vacas_repaso = vacas_iatf - preñez_iatf
-        preñez_toro = vacas_repaso * config.tasa_preñez_toro
-        total_preñeces_nuevas = preñez_iatf + preñez_toro
-        
-        vacas_vacias = vientres_actuales - total_preñeces_nuevas
-        
-        # 3. POLÍTICA DE DESCARTE (Salidas)
-        # A. Vacas Vacías
-        if anio == 1:
-            descarte_vacias = 0 # Gracia Año 1
-            # Las vacías se quedan para el año siguiente
-        else:
-            descarte_vacias = vacas_vacias # Se van todas
-            
-        # B. Vacas Viejas (Incluso si están preñadas, se descartan por edad/estructura)
-        # Aplicamos % sobre las que quedaron preñadas
-        descarte_vejez = total_preñeces_nuevas * config.descarte_vejez
-        
-        total_descarte_cabezas = descarte_vacias + descarte_vejez + exceso_inventario
-        
-        # Actualizamos preñeces para el año siguiente (quitamos las viejas que vendimos)
-        preñeces_pendientes = total_preñeces_nuevas - descarte_vejez
-        
-        # Actualizamos inventario final (para el loop siguiente)
-        # Nota: Si Año 1 no descarta vacías, siguen en el hato.
-        vientres_proximo_inicio = vientres_actuales - total_descarte_cabezas
-        
-        # 4. FINANZAS
-        ingreso_becerros = machos_venta * config.peso_destete_macho * config.precio_macho_destete
-        ingreso_descarte = total_descarte_cabezas * config.peso_vaca_descarte * config.precio_vaca_descarte
-        total_ingresos = ingreso_becerros + ingreso_descarte
-        
-        egresos_operativos = config.costos_fijos + (vientres_actuales * config.costo_variable_hato) + (vientres_actuales * config.costo_iatf)
-        
-        flujo_operativo = total_ingresos - egresos_operativos
-        
-        # 5. REINVERSIÓN
-        dinero_reinvertido = 0
-        nuevas_compras = 0
-        
-        if flujo_operativo > 0 and vientres_actuales < config.capacidad_maxima:
-            potencial_inversion = flujo_operativo * config.reinversion_utilidades
-            nuevas_compras = int(potencial_inversion / config.precio_compra_vientre)
-            dinero_reinvertido = nuevas_compras * config.precio_compra_vientre
-        
-        flujo_neto = flujo_operativo - dinero_reinvertido
-        caja_acumulada += flujo_neto
-        
-        # Guardar la compra para que entre el año siguiente
-        compras_pendientes_ingreso = nuevas_compras
-        
-        # Inventario reportado (Stock de apertura + Salidas por descarte para visualización correcta de flujos)
-        # Para gráficos de "Vientres", usaremos el inventario que produjo ese año (vientres_actuales)
-        
-        resultados.append({
-            "Año": anio,
-            "Inventario Inicial": int(vientres_actuales), 
-            "Vientres": int(vientres_actuales), # Alias para compatibilidad gráficos
-            "Nacimientos": int(nacimientos_totales),
-            "Ventas Descarte": int(total_descarte_cabezas),
-            "Compras (Entran sig año)": int(nuevas_compras),
-            "Hembras (Entran en 2 años)": int(hembras_reserva),
-            "Ingresos": round(total_ingresos, 2), # Alias UI
-            "Egresos OPEX": round(egresos_operativos, 2), # Alias UI
-            "Flujo Operativo": round(flujo_operativo, 2),
-            "Reinversión (70%)": round(dinero_reinvertido, 2), # Alias UI
-            "Flujo Neto (Socios)": round(flujo_neto, 2), # Alias UI
-            "Caja Acumulada (con CAPEX)": round(caja_acumulada, 2)
-        })
-
-        # Solo actualizamos la variable de iteracion AL FINAL
-        vientres_actuales = vientres_proximo_inicio 
-
-    return pd.DataFrame(resultados)
-
+# Perfilado: AGROVEN_PERFIL=1 o ?perfil=1 en la URL. Apagado no mide nada (ver agroven/perfil.py).
+if "perfil" not in st.session_state:
+    st.session_state.perfil = Perfilador()
+perfil = st.session_state.perfil
+perfil.activo = os.environ.get("AGROVEN_PERFIL", "") not in ("", "0") or st.query_params.get("perfil") in ("1", "true")
+perfil.nuevo_rerun()
 
 # --- UI DASHBOARD ---
 
@@ -186,6 +45,10 @@ st.sidebar.subheader("Inversión & Capacidad")
 capex = st.sidebar.number_input("CAPEX Inicial ($)", value=120000, step=5000)
 capacidad_max = st.sidebar.number_input("Capacidad Máxima (Vientres)", value=1500, step=50)
 
+st.sidebar.subheader("Modelo del Hato")
+MODELOS_HATO = {"Agregado (Original)": None, "Cohortes por Edad (Anual)": 1, "Cohortes por Edad (Mensual)": 12}
+modelo_hato = st.sidebar.selectbox("Modelo", list(MODELOS_HATO), help="Los modelos por cohortes siguen cada hembra por edad y número de partos.")
+
 # Configurar objeto
 config = GanaderiaConfig("Realista")
 
@@ -199,14 +62,17 @@ config = GanaderiaConfig("Realista")
 # Enfoque: Los sliders definen el valor "base". Si es pesimista, la clase aplicaría reducción.
 # Pero como los sliders son "inputs directos", vamos a asumir que el usuario manda sobre el preset.
 # EXCEPTO: La clase tiene la lógica de 'factor' dentro.
-# Para respetar el requerimiento de "Diales", actualizamos los atributos del objeto config.
-
-config.tasa_preñez_iatf = tasa_prenez_iatf
-config.mortalidad_cria = mortalidad_cria
-config.precio_macho_destete = precio_destete
-config.costos_fijos = costos_fijos
-config.capex_infraestructura = capex
-config.capacidad_maxima = capacidad_max
+# Para respetar el requerimiento de "Diales", la config final toma los valores de los diales
+# (la clase es inmutable: reemplazar() devuelve una config nueva con su propia huella).
+
+config = config.reemplazar(
+    tasa_preñez_iatf=tasa_prenez_iatf,
+    mortalidad_cria=mortalidad_cria,
+    precio_macho_destete=precio_destete,
+    costos_fijos=costos_fijos,
+    capex_infraestructura=capex,
+    capacidad_maxima=capacidad_max,
+)
 
 # Re-aplicar lógica pesimista si es necesario?
 # El usuario pidió "Selector de Escenario".
@@ -217,64 +83,347 @@ config.capacidad_maxima = capacidad_max
 # Solución práctica: El escenario "Pesimista" en el init es un PRESET.
 # Los sliders permiten ajuste fino.
 
-# Correr simulación
-df = simular_proyecto(10, config)
+@st.cache_resource
+def cache_resultados():
+    # Un solo caché por proceso del servidor (compartido por todas las sesiones) + SQLite en disco
+    return CacheResultados()
+
+@st.cache_data(show_spinner="Simulando trayectorias...")
+def monte_carlo_cacheado(parametros_config, variabilidad_bio, variabilidad_precios, trayectorias, semilla):
+    config_mc = GanaderiaConfig(**parametros_config)
+    distribuciones = distribuciones_por_defecto(config_mc, variabilidad_bio)
+    distribuciones.update({campo: distribucion for campo, distribucion in
+                           distribuciones_por_defecto(config_mc, variabilidad_precios).items()
+                           if campo.startswith("precio_")})
+    return simular_monte_carlo(config_mc, distribuciones, 10, trayectorias, semilla, hilos=os.cpu_count() or 1)
+
+@st.cache_data
+def sensibilidad_cacheada(parametros_config, variacion):
+    config_sens = GanaderiaConfig(**parametros_config)
+    return analisis_sensibilidad(config_sens, 10, (-variacion, -variacion / 2, variacion / 2, variacion))
+
+@st.cache_data(show_spinner="Simulando cartera...")
+def cartera_cacheada(fincas, years, bolsa_comun):
+    return simular_cartera(fincas, years, bolsa_comun)
+
+# --- SECCIONES (FRAGMENTOS) ---
+# Cada pestaña es un fragmento: sus propios controles (chat, cartera) sólo vuelven a ejecutar ese
+# fragmento. Dentro del simulador, sensibilidad, riesgo y optimizador son fragmentos anidados: sus
+# controles no rehacen la consulta a la caché, los gráficos ni la tabla del simulador.
+# La barra lateral queda fuera y sí provoca un rerun completo, que recibe sus valores como
+# argumentos y sirve lo demás desde las cachés.
+
+def mostrar_latencia(seccion, inicio):
+    # Latencia de la última interacción que ejecutó esta sección (rerun completo o sólo el fragmento)
+    ms = (time.perf_counter() - inicio) * 1000
+    latencias = st.session_state.setdefault("latencias", [])
+    latencias.append({"seccion": seccion, "ms": round(ms, 1)})
+    del latencias[:-200]
+    perfil.registrar(f"Sección: {seccion}", ms)
+    st.caption(f"⏱️ {seccion}: {ms:,.0f} ms")
+
+def aviso_modelo_agregado(modelo_hato):
+    # Sensibilidad, riesgo, optimizador y cartera corren sobre el núcleo por lotes del modelo agregado
+    if MODELOS_HATO[modelo_hato] is not None:
+        st.caption(f"ℹ️ Calculado con el modelo agregado: este bloque no usa {modelo_hato}.")
+
+# Fragmentos anidados del simulador. Tornado: sensibilidad por parámetro
+@st.fragment
+def bloque_sensibilidad(config, modelo_hato):
+    inicio = time.perf_counter()
+    st.markdown("### 🌪️ Sensibilidad por Parámetro")
+    aviso_modelo_agregado(modelo_hato)
+    col_s1, col_s2 = st.columns(2)
+    with col_s1:
+        variacion_sens = st.slider("Variación de cada parámetro (±%)", 0.05, 0.50, 0.10, 0.05)
+    with col_s2:
+        metrica_sens = st.selectbox("Métrica", ["Caja Final", "TIR", "Vientres Final"])
+    with perfil.etapa("Sensibilidad"):
+        _, ranking_sens = sensibilidad_cacheada(config.campos(), variacion_sens)
+    ranking_sens = ranking_sens.sort_values(f"Rango {metrica_sens}")
+
+    with perfil.etapa("Gráfico: Tornado"):
+        fig_tornado = go.Figure()
+        fig_tornado.add_trace(go.Bar(y=ranking_sens["Parámetro"], x=ranking_sens[f"{metrica_sens} (-)"], orientation='h', name=f'-{variacion_sens:.0%}', marker_color='#F44336'))
+        fig_tornado.add_trace(go.Bar(y=ranking_sens["Parámetro"], x=ranking_sens[f"{metrica_sens} (+)"], orientation='h', name=f'+{variacion_sens:.0%}', marker_color='#4CAF50'))
+        fig_tornado.update_layout(title=f"Impacto sobre {metrica_sens} (vs. Base)", barmode='overlay', xaxis_title="Cambio vs. Base", height=550)
+        st.plotly_chart(fig_tornado, use_container_width=True)
+
+    mostrar_latencia("Sensibilidad", inicio)
+
+# Riesgo: Monte Carlo sobre los parámetros biológicos y de precio
+@st.fragment
+def bloque_riesgo(config, modelo_hato):
+    inicio = time.perf_counter()
+    st.markdown("### 🎲 Análisis de Riesgo (Monte Carlo)")
+    aviso_modelo_agregado(modelo_hato)
+    if st.checkbox("Activar modo riesgo", value=False):
+        col_mc1, col_mc2, col_mc3, col_mc4 = st.columns(4)
+        with col_mc1:
+            trayectorias = st.selectbox("Trayectorias", [1_000, 10_000, 50_000, 100_000], index=1)
+        with col_mc2:
+            semilla = st.number_input("Semilla", value=42, step=1)
+        with col_mc3:
+            variabilidad_bio = st.slider("Volatilidad Biológica (±%)", 0.0, 0.5, 0.10, 0.01)
+        with col_mc4:
+            variabilidad_precios = st.slider("Volatilidad Precios (±%)", 0.0, 0.5, 0.15, 0.01)
+
+        with perfil.etapa("Monte Carlo", trayectorias=trayectorias):
+            mc = monte_carlo_cacheado(config.campos(), variabilidad_bio, variabilidad_precios, trayectorias, int(semilla))
+        bandas = mc["bandas"]
+
+        col_r1, col_r2, col_r3, col_r4, col_r5 = st.columns(5)
+        for columna, percentil in [(col_r1, "P5"), (col_r2, "P50"), (col_r3, "P95")]:
+            with columna:
+                valor = mc["tir"][percentil]
+                st.metric(f"TIR {percentil}", f"{valor * 100:.2f}%" if pd.notna(valor) else "N/D",
+                          help="Las trayectorias sin TIR (no recuperan el CAPEX) cuentan como -100%")
+        with col_r4:
+            st.metric("Prob. sin TIR", f"{mc['prob_sin_tir'] * 100:.1f}%")
+        with col_r5:
+            st.metric("Prob. sin Payback", f"{mc['prob_sin_payback'] * 100:.1f}%")
+
+        for nombre, eje in [("Caja Acumulada (con CAPEX)", "USD ($)"), ("Vientres", "Cabezas")]:
+            fig_banda = go.Figure()
+            fig_banda.add_trace(go.Scatter(x=bandas["Año"], y=bandas[f"{nombre} P95"], mode='lines', line_width=0, name='P95'))
+            fig_banda.add_trace(go.Scatter(x=bandas["Año"], y=bandas[f"{nombre} P5"], mode='lines', line_width=0, fill='tonexty', name='P5'))
+            fig_banda.add_trace(go.Scatter(x=bandas["Año"], y=bandas[f"{nombre} P50"], mode='lines+markers', name='P50'))
+            fig_banda.update_layout(title=f"{nombre}: Banda P5-P95", xaxis_title="Año", yaxis_title=eje)
+            st.plotly_chart(fig_banda, use_container_width=True)
+
+    mostrar_latencia("Riesgo", inicio)
+
+# Optimizador: política de reinversión, capacidad y CAPEX
+@st.fragment
+def bloque_optimizador(config, modelo_hato):
+    inicio = time.perf_counter()
+    st.markdown("### 🎯 Optimizador de Política")
+    aviso_modelo_agregado(modelo_hato)
+    with st.form("form_optimizador"):
+        col_o1, col_o2, col_o3 = st.columns(3)
+        with col_o1:
+            objetivo_opt = st.selectbox("Objetivo", OBJETIVOS)
+            tasa_descuento_opt = st.number_input("Tasa de Descuento (VPN)", value=0.10, step=0.01)
+            variables_opt = st.multiselect("Variables a Optimizar",
+                                           ["reinversion_utilidades", "capacidad_maxima", "capex_infraestructura"],
+                                           default=["reinversion_utilidades", "capacidad_maxima"])
+        with col_o2:
+            rango_reinversion = st.slider("Rango Reinversión", 0.0, 1.0, (0.0, 1.0), 0.05)
+            rango_capacidad = st.slider("Rango Capacidad (Vientres)", 200, 5000, (500, 3000), 50)
+            rango_capex = st.slider("Rango CAPEX ($)", 0, 500000, (50000, 250000), 5000)
+        with col_o3:
+            flujo_minimo_opt = st.number_input("Flujo Mínimo Socios por Año ($)", value=None, step=5000, placeholder="Sin restricción")
+            desde_anio_opt = st.number_input("Flujo Mínimo desde el Año", value=ANIO_INICIO_FLUJO_MINIMO, min_value=1,
+                                             max_value=10, step=1, help="El Año 1 es de gracia: sin destetes ni ventas de vacías")
+            capex_maximo_opt = st.number_input("CAPEX Máximo ($)", value=None, step=5000, placeholder="Sin restricción")
+            payback_maximo_opt = st.number_input("Payback Máximo (Año)", value=None, min_value=1, max_value=10, step=1, placeholder="Sin restricción")
+        optimizar = st.form_submit_button("Optimizar")
+
+    if optimizar and variables_opt:
+        rangos = {"reinversion_utilidades": rango_reinversion, "capacidad_maxima": rango_capacidad,
+                  "capex_infraestructura": rango_capex}
+        with st.spinner("Buscando la mejor política..."), perfil.etapa("Optimizador"):
+            st.session_state.optimizacion = optimizar_politica(
+                config, {campo: rangos[campo] for campo in variables_opt}, objetivo_opt,
+                {"flujo_minimo_socios": flujo_minimo_opt, "flujo_minimo_desde_anio": desde_anio_opt,
+                 "capex_maximo": capex_maximo_opt, "payback_maximo": payback_maximo_opt},
+                tasa_descuento=tasa_descuento_opt)
+            st.session_state.objetivo_optimizado = objetivo_opt
+
+    if "optimizacion" in st.session_state:
+        opt = st.session_state.optimizacion
+        if not opt["factible"]:
+            st.warning("Ningún candidato cumple las restricciones. Se muestra el punto de partida.")
+        col_p1, col_p2, col_p3, col_p4 = st.columns(4)
+        with col_p1:
+            st.metric("Reinversión", f"{opt['mejor_config'].reinversion_utilidades:.0%}")
+        with col_p2:
+            st.metric("Capacidad Máxima", f"{opt['mejor_config'].capacidad_maxima:,.0f}")
+        with col_p3:
+            st.metric("CAPEX", f"${opt['mejor_config'].capex_infraestructura:,.0f}")
+        with col_p4:
+            # El indicador que se optimizó, no siempre el VPN
+            objetivo = st.session_state.objetivo_optimizado
+            if objetivo == "TIR":
+                st.metric("TIR", f"{opt['metricas']['TIR']:.2%}" if opt["metricas"]["Estado TIR"] == TIR_OK
+                          else opt["metricas"]["Estado TIR"])
+            elif objetivo == "Payback":
+                payback = opt["metricas"]["Año Payback"]
+                st.metric("Payback", "No recupera" if pd.isna(payback) else f"Año {payback:.0f}")
+            else:
+                st.metric(objetivo, f"${opt['metricas'][objetivo]:,.2f}")
+        st.caption(f"{opt['evaluaciones']} configuraciones evaluadas.")
+        st.dataframe(opt["traza"])
 
-# Crear pestañas
-# Crear pestañas
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Simulador Financiero", "🚜 Ingeniería del Proyecto", "🧠 Metodología de Cálculo", "🤖 Asistente Veterinario"])
+    mostrar_latencia("Optimizador", inicio)
+
+@st.fragment
+def seccion_simulacion(config, modelo_hato):
+    inicio = time.perf_counter()
+
+    def correr_modelo():
+        with perfil.etapa("Simulación", modelo=modelo_hato):
+            if MODELOS_HATO[modelo_hato] is None:
+                # Bucle escalar de referencia: para un solo escenario es más rápido que el núcleo vectorizado
+                df = simular_proyecto(10, config)
+            else:
+                df = simular_cohortes(10, config, pasos_por_anio=MODELOS_HATO[modelo_hato])
+        # TIR simple (flujos de caja anuales incluyendo inversión inicial año 0)
+        with perfil.etapa("TIR"):
+            flujos = [-config.capex_infraestructura] + df["Flujo Neto (Socios)"].tolist()
+            # tir_lote directo: el DataFrame de metricas_lote cuesta más que la TIR de una sola fila
+            tir, estado = tir_lote(flujos)
+            return df, {"TIR": tir[0], "Estado TIR": estado[0]}
+
+    cache = cache_resultados()
+    with perfil.etapa("Caché de resultados"):
+        (df, metricas), nivel_cache = cache.obtener("simulacion", config, correr_modelo, years=10, modelo=modelo_hato)
 
-with tab1:
     # KPIs
     col1, col2, col3 = st.columns(3)
     vientres_final = df.iloc[-1]["Vientres"]
     caja_final = df.iloc[-1]["Caja Acumulada (con CAPEX)"]
 
-    # Calcular TIR simple (flujos de caja anuales incluyendo inversión inicial año 0)
-    flujos = [-config.capex_infraestructura] + df["Flujo Neto (Socios)"].tolist()
-    tir = npf.irr(flujos) * 100
-
     with col1:
         st.metric("Vientres (Año 10)", f"{vientres_final:,.0f}")
     with col2:
         st.metric("Caja Acumulada (Año 10)", f"${caja_final:,.2f}")
     with col3:
-        st.metric("TIR Estimada", f"{tir:.2f}%")
+        if metricas["Estado TIR"] == TIR_OK:
+            st.metric("TIR Estimada", f"{metricas['TIR'] * 100:.2f}%")
+        else:
+            st.metric("TIR Estimada", "N/D", help=f"TIR no definida: {metricas['Estado TIR']}")
+
+    if nivel_cache != "calculado":
+        st.caption(f"📦 Resultado servido desde la caché ({nivel_cache}), huella {config.huella}.")
+    elif MODELOS_HATO[modelo_hato] is not None:
+        st.caption(f"🐄 {modelo_hato}: hato estructurado por edad y paridad.")
+    st.caption(" · ".join(f"Caché {nivel}: {e['aciertos']} aciertos / {e['fallos']} fallos ({e['tasa_aciertos']:.0%})"
+                          for nivel, e in cache.estadisticas().items()))
 
     # Gráficos
     st.markdown("### 📈 Evolución del Proyecto")
 
     # 1. Linea: Vientres
-    fig_vientres = go.Figure()
-    fig_vientres.add_trace(go.Scatter(x=df["Año"], y=df["Vientres"], mode='lines+markers', name='Vientres Activos'))
-    fig_vientres.add_hline(y=config.capacidad_maxima, line_dash="dash", annotation_text="Capacidad Máxima")
-    fig_vientres.update_layout(title="Crecimiento del Hato vs Capacidad", xaxis_title="Año", yaxis_title="Cabezas")
-    st.plotly_chart(fig_vientres, use_container_width=True)
+    with perfil.etapa("Gráfico: Vientres"):
+        fig_vientres = go.Figure()
+        fig_vientres.add_trace(go.Scatter(x=df["Año"], y=df["Vientres"], mode='lines+markers', name='Vientres Activos'))
+        fig_vientres.add_hline(y=config.capacidad_maxima, line_dash="dash", annotation_text="Capacidad Máxima")
+        fig_vientres.update_layout(title="Crecimiento del Hato vs Capacidad", xaxis_title="Año", yaxis_title="Cabezas")
+        st.plotly_chart(fig_vientres, use_container_width=True)
 
     # 2. Barras: Flujo
-    fig_flujo = go.Figure()
-    fig_flujo.add_trace(go.Bar(x=df["Año"], y=df["Flujo Operativo"], name='Flujo Operativo', marker_color='#4CAF50'))
-    fig_flujo.add_trace(go.Bar(x=df["Año"], y=df["Flujo Neto (Socios)"], name='Flujo Neto (Socios)', marker_color='#2196F3'))
-    fig_flujo.update_layout(title="Flujo de Caja Anual", barmode='group', xaxis_title="Año", yaxis_title="USD ($)")
-    st.plotly_chart(fig_flujo, use_container_width=True)
+    with perfil.etapa("Gráfico: Flujo"):
+        fig_flujo = go.Figure()
+        fig_flujo.add_trace(go.Bar(x=df["Año"], y=df["Flujo Operativo"], name='Flujo Operativo', marker_color='#4CAF50'))
+        fig_flujo.add_trace(go.Bar(x=df["Año"], y=df["Flujo Neto (Socios)"], name='Flujo Neto (Socios)', marker_color='#2196F3'))
+        fig_flujo.update_layout(title="Flujo de Caja Anual", barmode='group', xaxis_title="Año", yaxis_title="USD ($)")
+        st.plotly_chart(fig_flujo, use_container_width=True)
 
     # 3. Area: Caja Acumulada
-    fig_acum = px.area(df, x="Año", y="Caja Acumulada (con CAPEX)", title="Curva de Recuperación de Inversión (Payback)")
-    fig_acum.add_hline(y=0, line_color="red", line_width=2)
-    st.plotly_chart(fig_acum, use_container_width=True)
+    with perfil.etapa("Gráfico: Payback"):
+        fig_acum = px.area(df, x="Año", y="Caja Acumulada (con CAPEX)", title="Curva de Recuperación de Inversión (Payback)")
+        fig_acum.add_hline(y=0, line_color="red", line_width=2)
+        st.plotly_chart(fig_acum, use_container_width=True)
+
+    # 4. Tornado (fragmento anidado: sus controles no rehacen lo de arriba ni la tabla)
+    bloque_sensibilidad(config, modelo_hato)
 
     # Tabla
     st.markdown("### 📋 Detalle Financiero Año a Año")
-    st.dataframe(df.style.format({
-        "Ingresos": "${:,.2f}",
-        "Egresos OPEX": "${:,.2f}",
-        "Flujo Operativo": "${:,.2f}",
-        "Reinversión (70%)": "${:,.2f}",
-        "Flujo Neto (Socios)": "${:,.2f}",
-        "Caja Acumulada (con CAPEX)": "${:,.2f}"
-    }))
-
-with tab2:
+    with perfil.etapa("Tabla (style.format)"):
+        st.dataframe(df.style.format({
+            "Ingresos": "${:,.2f}",
+            "Egresos OPEX": "${:,.2f}",
+            "Flujo Operativo": "${:,.2f}",
+            "Reinversión (70%)": "${:,.2f}",
+            "Flujo Neto (Socios)": "${:,.2f}",
+            "Caja Acumulada (con CAPEX)": "${:,.2f}"
+        }))
+
+    # Riesgo y optimizador, también fragmentos anidados
+    bloque_riesgo(config, modelo_hato)
+    bloque_optimizador(config, modelo_hato)
+
+    mostrar_latencia("Simulador", inicio)
+
+# Cartera: varias fincas con su propio hato inicial, capacidad, CAPEX y año de arranque.
+# Los campos que no están en la tabla toman el valor de la barra lateral.
+FINCAS_EJEMPLO = [
+    {"Finca": "La Ceiba", "Año Inicio": 1, "vientres_iniciales": 500, "capacidad_maxima": 1500, "capex_infraestructura": 120000},
+    {"Finca": "El Palmar", "Año Inicio": 3, "vientres_iniciales": 300, "capacidad_maxima": 900, "capex_infraestructura": 80000},
+    {"Finca": "Santa Rosa", "Año Inicio": 5, "vientres_iniciales": 800, "capacidad_maxima": 2500, "capex_infraestructura": 200000},
+]
+
+@st.fragment
+def seccion_cartera(config, modelo_hato):
+    inicio = time.perf_counter()
+    st.markdown("### 🏘️ Cartera de Fincas")
+    aviso_modelo_agregado(modelo_hato)
+    st.markdown("Varias propiedades con su propio hato inicial, capacidad, CAPEX y año de arranque. "
+                "Los demás parámetros se toman de la barra lateral.")
+
+    archivo = st.file_uploader("Importar fincas (CSV: Finca, Año Inicio y campos de la config)", type=["csv"],
+                               key="fincas_csv")
+    fincas = pd.read_csv(archivo) if archivo is not None else pd.DataFrame(FINCAS_EJEMPLO)
+    if len(fincas) <= 50:
+        fincas = st.data_editor(fincas, num_rows="dynamic", hide_index=True, key="editor_fincas")
+    else:
+        st.caption(f"{len(fincas):,} fincas importadas (la edición en tabla se ofrece hasta 50).")
+
+    col_c1, col_c2 = st.columns(2)
+    with col_c1:
+        years_cartera = st.slider("Horizonte (años)", 10, 30, 30, 1)
+    with col_c2:
+        bolsa_comun = st.checkbox("Bolsa común de reinversión", value=False,
+                                  help="La reinversión de todas las fincas compra vientres primero donde el retorno marginal es mayor.")
+
+    # Columnas ausentes y celdas vacías -> valores de la barra lateral
+    fincas = fincas.dropna(how="all").fillna(config.campos())
+    fincas = fincas.assign(**{campo: valor for campo, valor in config.campos().items() if campo not in fincas.columns})
+    try:
+        with perfil.etapa("Cartera", fincas=len(fincas), years=years_cartera):
+            cartera = cartera_cacheada(fincas, years_cartera, bolsa_comun)
+    except (ValueError, KeyError) as e:
+        st.error(f"Revisa la tabla de fincas: {e}")
+        mostrar_latencia("Cartera", inicio)
+        return
+    consolidado, metricas = cartera["consolidado"], cartera["metricas"]
+
+    col_k1, col_k2, col_k3, col_k4 = st.columns(4)
+    with col_k1:
+        st.metric(f"Vientres (Año {years_cartera})", f"{consolidado.iloc[-1]['Vientres']:,.0f}")
+    with col_k2:
+        st.metric(f"Caja Acumulada (Año {years_cartera})", f"${consolidado.iloc[-1]['Caja Acumulada (con CAPEX)']:,.2f}")
+    with col_k3:
+        if metricas["Estado TIR"] == TIR_OK:
+            st.metric("TIR Consolidada", f"{metricas['TIR'] * 100:.2f}%")
+        else:
+            st.metric("TIR Consolidada", "N/D", help=f"TIR no definida: {metricas['Estado TIR']}")
+    with col_k4:
+        st.metric("Necesidad Máxima de Caja", f"${metricas['Necesidad Máxima de Caja']:,.0f}")
+
+    with perfil.etapa("Gráfico: Cartera"):
+        fig_cartera = go.Figure()
+        fig_cartera.add_trace(go.Bar(x=consolidado["Año"], y=consolidado["Flujo Neto (Socios)"], name='Flujo Neto (Socios)', marker_color='#2196F3'))
+        fig_cartera.add_trace(go.Bar(x=consolidado["Año"], y=-consolidado["CAPEX"], name='CAPEX', marker_color='#F44336'))
+        fig_cartera.add_trace(go.Scatter(x=consolidado["Año"], y=consolidado["Vientres"], name='Vientres', yaxis='y2', mode='lines+markers'))
+        fig_cartera.update_layout(title="Flujo Consolidado y Hato del Grupo", barmode='relative', xaxis_title="Año",
+                                  yaxis_title="USD ($)", yaxis2=dict(title="Cabezas", overlaying='y', side='right'))
+        st.plotly_chart(fig_cartera, use_container_width=True)
+
+    st.markdown("**Métricas por finca**")
+    if bolsa_comun:
+        st.caption("Con bolsa común cada finca paga su aporte a la bolsa y recibe sin cargo las vacas asignadas: "
+                   "sus métricas miden su contribución al grupo, no una finca autónoma.")
+    st.dataframe(cartera["metricas_fincas"], hide_index=True)
+    st.markdown("**Consolidado año a año**")
+    st.dataframe(consolidado, hide_index=True)
+    mostrar_latencia("Cartera", inicio)
+
+# Contenido estático: sin controles propios, no se vuelve a ejecutar por interacciones en otras pestañas
+@st.fragment
+def seccion_ingenieria():
     st.markdown("### 🚜 Ingeniería del Proyecto")
     
     st.info("**Título: Reactivación Hidráulica y Control de Inundaciones**")
@@ -298,7 +447,8 @@ with tab2:
     - **Meta Comercial:** Peso al destete de 190 kg (machos).
     """)
 
-with tab3:
+@st.fragment
+def seccion_metodologia():
     st.markdown("### 🧠 Metodología de Cálculo")
     st.markdown("""
     A continuación se listan las reglas lógicas utilizadas en la simulación:
@@ -321,115 +471,206 @@ with tab3:
    - **Descarte Estructural:** Se asume un 3% adicional de venta de vacas preñadas por vejez/causas ajenas a la reproducción.
     """)
 
+@st.cache_resource(max_entries=8, show_spinner="Indexando documentación...")
+def indice_documentacion(huella, _textos):
+    # Un índice BM25 por combinación de documentos (huella); en disco sobrevive a reinicios
+    return cargar_o_construir(_textos)
+
+@st.cache_resource(show_spinner=False)
+def backend_asistente(nombre, api_key):
+    # Un backend (y su cliente HTTP) por proceso, reutilizado por todos los reruns y sesiones
+    return crear_backend(nombre, api_key=api_key)
+
+@st.cache_resource
+def cache_respuestas():
+    # Respuestas por pregunta normalizada + contexto, compartidas por todas las sesiones del proceso
+    return CacheRespuestas()
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def leer_cerebro(ruta, modificado):
+    # Se relee sólo si cambia la fecha de modificación del archivo
+    with open(ruta, "r", encoding="utf-8") as f:
+        return f.read()
+
+def documentacion_asistente():
+    # 2a. Lógica de Contexto (Cerebro + Uploads): se indexa por secciones y a cada consulta
+    # sólo se le envían las más relevantes. Escribe en la barra lateral, por eso corre fuera
+    # del fragmento del chat (un cambio de adjunto provoca un rerun completo).
+    st.sidebar.header("📁 Documentación Técnica")
+    
+    textos = {}
+
+    # A. Carga Automática de Cerebro Maestro (Memoria Permanente)
+    CEREBRO_PATH = "CEREBRO_AGROVEN.txt"
+    if os.path.exists(CEREBRO_PATH):
+        try:
+            with perfil.etapa("Lectura Cerebro"):
+                textos["Cerebro Maestro"] = leer_cerebro(CEREBRO_PATH, os.path.getmtime(CEREBRO_PATH))
+            st.sidebar.info("✅ Cerebro Maestro: Cargado")
+        except Exception as e:
+            st.sidebar.error(f"Error cargando cerebro: {e}")
+    else:
+        st.sidebar.warning("⚠️ No se detectó cerebro base")
+
+    # B. Carga Manual (Memoria Temporal)
+    uploaded_file = st.sidebar.file_uploader(
+        "Cargar PDF, DOCX o TXT (Extras)", 
+        type=["pdf", "docx", "txt"],
+        key="doc_uploader"
+    )
+    
+    if uploaded_file is not None:
+        try:
+            # PDF, DOCX o TXT: se parsea una sola vez por contenido (caché por hash de los bytes)
+            with perfil.etapa("Extracción adjunto", bytes=uploaded_file.size):
+                texto_adjunto, info_adjunto = extraer_texto(uploaded_file.name, uploaded_file.getvalue())
+            perfil.registrar("Adjunto", origen=info_adjunto["origen"], paginas=info_adjunto["paginas"])
+            perfil.tamano("Adjunto (caracteres)", len(texto_adjunto))
+            textos[uploaded_file.name] = texto_adjunto
+            detalle = f" · {info_adjunto['paginas']} págs." if info_adjunto["paginas"] else ""
+            st.sidebar.success(f"✅ Procesado: {uploaded_file.name}{detalle} ({info_adjunto['origen']})")
+            if info_adjunto["truncado"]:
+                st.sidebar.warning("⚠️ Documento extenso: sólo se usó la primera parte (tope de páginas/caracteres).")
+            
+        except Exception as e:
+            st.sidebar.error(f"Error leyendo archivo: {e}")
+
+    with perfil.etapa("Índice BM25"):
+        indice, origen_indice = indice_documentacion(huella_textos(textos), textos)
+    if len(indice):
+        st.sidebar.caption(f"🔎 {len(indice)} secciones indexadas (índice {origen_indice}); se envían las {TOP_K} más relevantes por consulta.")
+    return indice
+
+@st.fragment
+def seccion_asistente(backend, indice):
+    inicio = time.perf_counter()
+
+    # 3. Inicializar Historial
+    if "messages" not in st.session_state:
+        st.session_state.messages = []
+
+    # 4. Mostrar Historial en UI
+    for message in st.session_state.messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+    # 5. Capturar Input del Usuario
+    if prompt := st.chat_input("Escribe tu consulta aquí..."):
+        # Mostrar mensaje usuario
+        st.chat_message("user").markdown(prompt)
+        st.session_state.messages.append({"role": "user", "content": prompt})
+
+        # 6. Lógica de Respuesta (Modelo Lite)
+        
+        # --- MANEJO DE ARCHIVOS ADJUNTOS (Ya procesado arriba) ---
+
+        # Definir el Prompt del Sistema (Contexto)
+        base_system_prompt = "Eres el experto veterinario de Agroven. Finca de 1020ha, bombas axiales, pasto Mombasa, ganado F1 Brahman x Romosinuano. Meta: 1500 vientres. Reinversión 70%. Responde técnico y directo."
+        
+        # Sólo las secciones relevantes para esta consulta y el tema en curso (vacío si nada coincide)
+        anteriores = st.session_state.messages[:-1]
+        with perfil.etapa("Recuperación BM25"):
+            relevantes = indice.buscar(consulta_recuperacion(anteriores, prompt), TOP_K)
+        system_instruction = base_system_prompt + armar_contexto(relevantes)
+        # Últimas vueltas de la conversación que caben en el presupuesto de tokens; entran en la
+        # huella porque la respuesta a una repregunta depende de ellas
+        historial, resumidos = ventana_historial(anteriores, system_instruction, prompt)
+        respuestas = cache_respuestas()
+        huella = huella_contexto(system_instruction, backend.modelo, historial)
+        
+        try:
+            with st.chat_message("assistant"):
+                en_cache, bot_reply = respuestas.obtener(prompt, huella)
+                if en_cache:
+                    st.markdown(bot_reply)
+                    st.caption("⚡ Respuesta servida desde la caché local (misma pregunta, conversación y documentación).")
+                else:
+                    perfil.tamano("Contexto enviado (caracteres)", len(system_instruction) + len(prompt)
+                                  + sum(len(m["texto"]) for m in historial))
+                    perfil.tamano("Historial enviado (mensajes)", len(historial))
+                    # Mostrar respuesta bot a medida que llega (temperatura 0.3: poca creatividad, más precisión)
+                    with perfil.etapa("Modelo (respuesta completa)", backend=backend.nombre):
+                        bot_reply = st.write_stream(perfil.primer_trozo("Modelo (primer trozo)",
+                            backend.responder(prompt, system_instruction, relevantes, historial)))
+                    respuestas.guardar(prompt, huella, bot_reply)
+                if relevantes:
+                    st.caption("📚 Fuentes: " + " · ".join(f"{fragmento['titulo']} ({puntaje:.1f})" for puntaje, fragmento in relevantes))
+            
+            st.session_state.messages.append({"role": "assistant", "content": bot_reply})
+        except Exception as e:
+            st.error(f"Error conectando con {backend.modelo}: {e}")
+
+    stats_respuestas = cache_respuestas().estadisticas()
+    st.caption(f"💬 Caché de respuestas: {stats_respuestas['aciertos']} aciertos / {stats_respuestas['fallos']} fallos "
+               f"({stats_respuestas['tasa_aciertos']:.0%}), {stats_respuestas['entradas']} guardadas.")
+    mostrar_latencia("Asistente", inicio)
+
+# Crear pestañas
+tab1, tab_cartera, tab2, tab3, tab4 = st.tabs(["📊 Simulador Financiero", "🏘️ Cartera de Fincas", "🚜 Ingeniería del Proyecto", "🧠 Metodología de Cálculo", "🤖 Asistente Veterinario"])
+
+with tab1:
+    seccion_simulacion(config, modelo_hato)
+
+with tab_cartera:
+    seccion_cartera(config, modelo_hato)
+
+with tab2:
+    seccion_ingenieria()
+
+with tab3:
+    seccion_metodologia()
+
 with tab4:
     st.markdown("### 🤖 Asistente Veterinario (IA)")
     st.markdown("Consulta cualquier duda técnica, sanitaria o financiera al Director Veterinario Virtual.")
 
+    # Backend "local": respuestas extractivas sin modelo ni conexión (pruebas / sin API Key)
+    nombre_backend = os.environ.get("AGROVEN_ASISTENTE", "gemini")
+    backend_local = nombre_backend == "local"
+
     # 1. Verificar API Key
-    if "GOOGLE_API_KEY" not in st.secrets:
+    if not backend_local and "GOOGLE_API_KEY" not in st.secrets:
         st.warning("⚠️ Error: No se encontró la `GOOGLE_API_KEY` en los secretos de Streamlit. Por favor configúrala para activar el asistente.")
     else:
-        # 2. Inicializar Cliente (SDK v2)
+        # 2. Inicializar Cliente (SDK v2), una sola vez por proceso
         try:
-            client = genai.Client(api_key=st.secrets["GOOGLE_API_KEY"])
+            backend = backend_asistente(nombre_backend, None if backend_local else st.secrets["GOOGLE_API_KEY"])
         except Exception as e:
             st.error("Falta configurar la API Key en secrets.")
             st.stop()
-        
-        # 2a. Lógica de Contexto (Cerebro + Uploads)
-        st.sidebar.header("📁 Documentación Técnica")
-        
-        contexto_acumulado = ""
-
-        # A. Carga Automática de Cerebro Maestro (Memoria Permanente)
-        CEREBRO_PATH = "CEREBRO_AGROVEN.txt"
-        if os.path.exists(CEREBRO_PATH):
-            try:
-                with open(CEREBRO_PATH, "r", encoding="utf-8") as f:
-                    content = f.read()
-                    contexto_acumulado += content + "\n\n"
-                    st.sidebar.info("✅ Cerebro Maestro: Cargado")
-            except Exception as e:
-                st.sidebar.error(f"Error cargando cerebro: {e}")
-        else:
-            st.sidebar.warning("⚠️ No se detectó cerebro base")
-
-        # B. Carga Manual (Memoria Temporal)
-        uploaded_file = st.sidebar.file_uploader(
-            "Cargar PDF, DOCX o TXT (Extras)", 
-            type=["pdf", "docx", "txt"],
-            key="doc_uploader"
-        )
-        
-        if uploaded_file is not None:
-            try:
-                # CASO 1: PDF
-                if uploaded_file.name.endswith(".pdf"):
-                    pdf_reader = PdfReader(uploaded_file)
-                    for page in pdf_reader.pages:
-                        contexto_acumulado += page.extract_text() + "\n"
-                
-                # CASO 2: WORD (.docx)
-                elif uploaded_file.name.endswith(".docx"):
-                    doc = docx.Document(uploaded_file)
-                    for para in doc.paragraphs:
-                        contexto_acumulado += para.text + "\n"
-                
-                # CASO 3: TEXTO (.txt)
-                elif uploaded_file.name.endswith(".txt"):
-                    contexto_acumulado += uploaded_file.read().decode("utf-8")
-                
-                st.sidebar.success(f"✅ Procesado: {uploaded_file.name}")
-                
-            except Exception as e:
-                st.sidebar.error(f"Error leyendo archivo: {e}")
-
-        # 3. Inicializar Historial
-        if "messages" not in st.session_state:
-            st.session_state.messages = []
-
-        # 4. Mostrar Historial en UI
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
-
-        # 5. Capturar Input del Usuario
-        if prompt := st.chat_input("Escribe tu consulta aquí..."):
-            # Mostrar mensaje usuario
-            st.chat_message("user").markdown(prompt)
-            st.session_state.messages.append({"role": "user", "content": prompt})
-
-            # 6. Lógica de Respuesta (Modelo Lite)
-            
-            # --- MANEJO DE ARCHIVOS ADJUNTOS (Ya procesado arriba) ---
 
-            # Definir el Prompt del Sistema (Contexto)
-            base_system_prompt = "Eres el experto veterinario de Agroven. Finca de 1020ha, bombas axiales, pasto Mombasa, ganado F1 Brahman x Romosinuano. Meta: 1500 vientres. Reinversión 70%. Responde técnico y directo."
-            
-            if contexto_acumulado:
-                system_instruction = base_system_prompt + f"\n\n--- DOCUMENTACIÓN TÉCNICA Y CONTEXTO ---\n{contexto_acumulado}\n---------------------------------------"
-            else:
-                system_instruction = base_system_prompt
-            
-            # Configurar la llamada
-            model_id = "gemini-flash-lite-latest"
-            
-            try:
-                response = client.models.generate_content(
-                    model=model_id,
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        system_instruction=system_instruction,
-                        temperature=0.3 # Poca creatividad, más precisión
-                    )
-                )
-                
-                bot_reply = response.text
-                
-                # Mostrar respuesta bot
-                with st.chat_message("assistant"):
-                    st.markdown(bot_reply)
-                
-                st.session_state.messages.append({"role": "assistant", "content": bot_reply})
-            except Exception as e:
-                st.error(f"Error conectando con {model_id}: {e}")
+        seccion_asistente(backend, documentacion_asistente())
+
+# --- PANEL DE RENDIMIENTO ---
+@st.fragment
+def panel_rendimiento():
+    # Fragmento propio: "Actualizar" incorpora lo medido en reruns de otras secciones sin rerun completo
+    with st.expander("⏱️ Rendimiento", expanded=False):
+        st.button("Actualizar", key="perfil_actualizar")
+        st.markdown("**Etapas**")
+        st.dataframe(perfil.resumen(), hide_index=True)
+
+        st.markdown("**Cachés**")
+        filas = [dict(Caché=f"Resultados ({nivel})", **e) for nivel, e in cache_resultados().estadisticas().items()]
+        filas.append(dict(Caché="Respuestas del asistente", **cache_respuestas().estadisticas()))
+        filas.append(dict(Caché="Textos de adjuntos", **estadisticas_textos()))
+        st.dataframe([{"Caché": f["Caché"], "Aciertos": f["aciertos"], "Fallos": f["fallos"], "Entradas": f["entradas"],
+                       "Tasa": f"{f['tasa_aciertos']:.0%}"} for f in filas], hide_index=True)
+
+        if perfil.tamanos:
+            st.markdown("**Tamaños**")
+            for nombre, valor in perfil.tamanos.items():
+                st.caption(f"{nombre}: {valor:,}")
+
+        # Trazas: descarga manual o, con AGROVEN_PERFIL_TRAZAS, se agregan a ese archivo en cada rerun
+        if os.environ.get("AGROVEN_PERFIL_TRAZAS"):
+            perfil.exportar_jsonl(os.environ["AGROVEN_PERFIL_TRAZAS"])
+        st.download_button("Exportar trazas (JSONL)", perfil.a_jsonl(), file_name="agroven_trazas.jsonl",
+                           mime="application/jsonl")
+
+ms_rerun = (time.perf_counter() - inicio_rerun) * 1000
+perfil.registrar("Rerun completo", ms_rerun)
+st.sidebar.caption(f"⏱️ Rerun completo: {ms_rerun:,.0f} ms")
+if perfil.activo:
+    with st.sidebar:
+        panel_rendimiento()
@@ -0,0 +1,505 @@
+# --- BENCHMARK Y REGRESIÓN ---
+# Mide las etapas del simulador y del asistente sin red y verifica que las cifras año a año del
+# dashboard no cambien (golden.json).
+#   python benchmarks/benchmark.py                 # verifica golden, mide y compara con la base
+#   python benchmarks/benchmark.py --guardar       # además guarda las mediciones como nueva base
+#   python benchmarks/benchmark.py --rapido        # tamaños y repeticiones reducidos
+#   python benchmarks/benchmark.py --solo pdf      # sólo etapas cuyo nombre contiene "pdf"
+# Antes de medir verifica los contratos del motor: simular_lote == simular_proyecto fila a fila y
+# tir_lote == npf.irr, sobre configs y flujos aleatorios.
+# Sale con código 1 si falla un golden, la equivalencia o si una etapa es más lenta que la base en más del umbral
+# (--umbral 0.30 = 30%). La base depende de la máquina: se guarda por defecto en
+# .cache/benchmark_base.json (otra ruta con --base, p. ej. una versionada para CI).
+# --actualizar-golden sólo debe usarse cuando cambian a propósito las reglas de negocio.
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from agroven import (GanaderiaConfig, simular_proyecto, simular_lote, simular_cohortes, metricas_lote, tir_lote,
+                     simular_cartera, optimizar_politica, CAMPOS_CONFIG)
+from agroven import ingesta
+from agroven.recuperacion import TOP_K, cargar_o_construir, armar_contexto
+from agroven.conversacion import CacheRespuestas, ventana_historial, huella_contexto
+from agroven.asistente import crear_backend
+import servidor_falso
+
+RUTA_GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden.json")
+RUTA_BASE = os.path.join(RAIZ, ".cache", "benchmark_base.json")
+RUTA_CEREBRO = os.path.join(RAIZ, "CEREBRO_AGROVEN.txt")
+UMBRAL = 0.30
+PISO_SEGUNDOS = 0.002 # Diferencias menores se consideran ruido aunque superen el umbral
+
+# --- GOLDEN: CIFRAS DEL DASHBOARD ---
+# (nombre, escenario, cambios sobre la config, años, pasos por año del modelo de cohortes o None = agregado)
+CASOS_GOLDEN = [
+    ("Realista (dashboard por defecto)", "Realista", {}, 10, None),
+    ("Pesimista", "Pesimista", {}, 10, None),
+    ("Preñez IATF 30%", "Realista", {"tasa_preñez_iatf": 0.30}, 10, None),
+    ("Preñez IATF 70%", "Realista", {"tasa_preñez_iatf": 0.70}, 10, None),
+    ("Mortalidad cría 10%", "Realista", {"mortalidad_cria": 0.10}, 10, None),
+    ("Precio destete 3.5", "Realista", {"precio_macho_destete": 3.5}, 10, None),
+    ("Costos fijos 80.000", "Realista", {"costos_fijos": 80000}, 10, None),
+    ("CAPEX 300.000", "Realista", {"capex_infraestructura": 300000}, 10, None),
+    ("Capacidad 800", "Realista", {"capacidad_maxima": 800}, 10, None),
+    ("Capacidad 3.000", "Realista", {"capacidad_maxima": 3000}, 10, None),
+    ("Horizonte 30 años", "Realista", {}, 30, None),
+    ("Cohortes por edad (anual)", "Realista", {}, 10, 1),
+    ("Cohortes por edad (mensual)", "Realista", {}, 10, 12),
+]
+
+def _salida_golden(escenario, cambios, years, pasos):
+    config = GanaderiaConfig(escenario, **cambios)
+    if pasos is None:
+        df = simular_proyecto(years, config)
+    else:
+        df = simular_cohortes(years, config, pasos_por_anio=pasos)
+    metricas = metricas_lote([-config.capex_infraestructura] + df["Flujo Neto (Socios)"].tolist()).iloc[0]
+    return {"filas": {col: df[col].tolist() for col in df.columns},
+            "tir": None if np.isnan(metricas["TIR"]) else float(metricas["TIR"])}
+
+def generar_golden():
+    casos = []
+    for nombre, escenario, cambios, years, pasos in CASOS_GOLDEN:
+        casos.append(dict(nombre=nombre, escenario=escenario, cambios=cambios, years=years, pasos=pasos,
+                          **_salida_golden(escenario, cambios, years, pasos)))
+    return {"casos": casos}
+
+def verificar_golden(golden):
+    # Lista de diferencias (vacía = todo igual). Cabezas exactas, dinero al centavo, TIR a 1e-9.
+    errores = []
+    for caso in golden["casos"]:
+        actual = _salida_golden(caso["escenario"], caso["cambios"], caso["years"], caso["pasos"])
+        for col, esperados in caso["filas"].items():
+            obtenidos = actual["filas"].get(col)
+            if obtenidos is None or len(obtenidos) != len(esperados):
+                errores.append(f"{caso['nombre']}: columna {col} ausente o de otro largo")
+                continue
+            for anio, (esperado, obtenido) in enumerate(zip(esperados, obtenidos), start=1):
+                if abs(esperado - obtenido) >= (0.005 if isinstance(esperado, float) else 0.5):
+                    errores.append(f"{caso['nombre']}: {col} año {anio}: {esperado} -> {obtenido}")
+                    break
+        if (caso["tir"] is None) != (actual["tir"] is None) or \
+                (caso["tir"] is not None and abs(caso["tir"] - actual["tir"]) > 1e-9):
+            errores.append(f"{caso['nombre']}: TIR {caso['tir']} -> {actual['tir']}")
+    return errores
+
+# --- EQUIVALENCIA: MOTOR POR LOTES Y TIR ---
+# Contratos que las optimizaciones no pueden romper: cada fila de simular_lote es idéntica a
+# simular_proyecto (mismo redondeo, centavo a centavo) y tir_lote da la misma raíz que npf.irr
+# dentro de la malla de tasas [TIR_MINIMA, TIR_MAXIMA].
+
+def configs_aleatorias(n, semilla=11):
+    # Configs "de dial": cada campo cambia con probabilidad 1/2 a un valor redondo (precios a la
+    # décima, montos al millar, tasas al 5%). Son las que producen empates de redondeo al centavo
+    # (p. ej. Ingresos 220471.065 con precio 2.2 y costos fijos 59000).
+    rng = np.random.default_rng(semilla)
+    base = GanaderiaConfig().campos()
+    configs = []
+    for _ in range(n):
+        valores = {}
+        for campo, valor in base.items():
+            if rng.random() < 0.5:
+                continue
+            nuevo = valor * rng.uniform(0.7, 1.3)
+            if valor < 1:
+                valores[campo] = min(round(nuevo * 20) / 20, 1.0)
+            elif valor < 10:
+                valores[campo] = round(nuevo, 1)
+            else:
+                valores[campo] = round(nuevo, -3 if valor >= 10_000 else 0)
+        configs.append(GanaderiaConfig(**valores))
+    return configs
+
+def verificar_equivalencia(n=1_500, semilla=11):
+    # Lista de diferencias (vacía = contratos cumplidos)
+    import numpy_financial as npf
+    from agroven.finanzas import TIR_MINIMA, TIR_MAXIMA
+    from agroven.modelo import simular_resultado
+    from agroven.resultados import COLUMNAS_CABEZAS, COLUMNAS_DINERO
+    errores = []
+    configs = configs_aleatorias(n, semilla)
+    for years in (10, 30):
+        lote = simular_lote(configs, years)
+        for i, config in enumerate(configs):
+            # Referencia independiente del redondeo vectorizado: el bucle escalar del modelo con
+            # int() y round() de Python aplicados valor por valor, como el simular_proyecto original
+            crudo = simular_resultado(years, config)
+            esperado = {col: [int(v) for v in crudo[col][0].tolist()] for col in COLUMNAS_CABEZAS}
+            esperado.update({col: [round(v, 2) for v in crudo[col][0].tolist()] for col in COLUMNAS_DINERO})
+            distintas = [col for col, valores in esperado.items() if lote[col][i].tolist() != valores]
+            if distintas:
+                errores.append(f"simular_lote != simular_proyecto ({years} años, config {i}): {', '.join(distintas)}")
+
+    # TIR: flujos del simulador y flujos aleatorios con varios cambios de signo
+    rng = np.random.default_rng(semilla)
+    capex = np.array([c.capex_infraestructura for c in configs])
+    flujos = np.vstack([np.column_stack([-capex, simular_lote(configs, 10)["Flujo Neto (Socios)"]]),
+                        np.round(rng.normal(20_000, 50_000, (n, 11)), -2) * np.r_[-1, np.ones(10)]])
+    tir, _ = tir_lote(flujos)
+    for fila, obtenida in zip(flujos, tir):
+        esperada = npf.irr(fila)
+        if not np.isnan(esperada) and not TIR_MINIMA <= esperada <= TIR_MAXIMA:
+            continue # Fuera de la malla: tir_lote lo marca "Fuera de rango" a propósito
+        if np.isnan(esperada) != np.isnan(obtenida) or abs(esperada - obtenida) > 1e-9:
+            errores.append(f"tir_lote {obtenida} != npf.irr {esperada} para {fila.tolist()}")
+    return errores
+
+# --- CONTRATOS: CASOS PUNTUALES DEL DASHBOARD ---
+
+def verificar_contratos():
+    # Lista de incumplimientos (vacía = contratos cumplidos)
+    errores = []
+
+    # Flujo mínimo 0 desde el Año 2: la configuración base ya lo cumple (sólo el Año 1 de gracia es negativo)
+    opt = optimizar_politica(GanaderiaConfig(), {"reinversion_utilidades": (0.0, 1.0)}, "VPN",
+                             {"flujo_minimo_socios": 0}, iteraciones=2, tamano_lote=20)
+    if not opt["factible"]:
+        errores.append("optimizador: flujo mínimo 0 desde el Año 2 sin candidato factible")
+
+    # Caché de textos: los mismos bytes con otra extensión no se sirven desde la caché
+    datos = "Plan sanitario: aftosa y brucelosis".encode()
+    ingesta.extraer_texto("plan.txt", datos, carpeta=None)
+    try:
+        _, info = ingesta.extraer_texto("plan.docx", datos, carpeta=None)
+    except Exception:
+        info = None # python-docx rechaza los bytes: se intentó extraer, como corresponde
+    if info is not None and info["origen"] != "extraído":
+        errores.append(f"ingesta: plan.docx servido desde la caché ({info['origen']}) con el texto de plan.txt")
+
+    # Caché de respuestas: una repregunta en otra conversación no recibe la respuesta guardada
+    respuestas = CacheRespuestas()
+    system_instruction, repregunta = "Eres el experto veterinario de Agroven.", "¿Y la dosis?"
+    for tema, respuesta in ((CONSULTAS[0], "Diminazeno 3.5 mg/kg."), (CONSULTAS[2], "Sulfato de cobre al 5%.")):
+        historial, _ = ventana_historial([{"role": "user", "content": tema}, {"role": "assistant", "content": "..."}],
+                                         system_instruction, repregunta)
+        huella = huella_contexto(system_instruction, "modelo", historial)
+        en_cache, guardada = respuestas.obtener(repregunta, huella)
+        if en_cache:
+            errores.append(f"conversación: '{repregunta}' tras '{tema}' servida con '{guardada}'")
+        respuestas.guardar(repregunta, huella, respuesta)
+
+    # Bolsa común: la finca que va primero en el reparto no es la primera fila de la tabla, ni con
+    # mejor retorno marginal (precio) ni en el empate con la barra lateral (cobertura de costos fijos)
+    for primera, segunda in (({"vientres_iniciales": 500}, {"vientres_iniciales": 500, "precio_macho_destete": 3.0}),
+                             ({"vientres_iniciales": 800}, {"vientres_iniciales": 300})):
+        fincas = [dict(primera, Finca="Primera fila", capacidad_maxima=1500),
+                  dict(segunda, Finca="Segunda fila", capacidad_maxima=1500)]
+        por_finca = simular_cartera(fincas, 10, bolsa_comun=True)["fincas"]
+        # Año 2: el primero con utilidad; la bolsa no alcanza para llenar ningún cupo
+        compras = dict(zip(por_finca["Finca"][1::10], por_finca["Compras (Entran sig año)"][1::10]))
+        if not compras["Primera fila"] == 0 < compras["Segunda fila"]:
+            errores.append(f"cartera: con {segunda} la bolsa común compró {compras} en el Año 2")
+
+    # TIR: flujos con NaN o infinitos tienen su propio estado, no "Fuera de rango" ni "Sin cambio de signo"
+    from agroven.finanzas import TIR_FLUJO_INVALIDO
+    _, estados = tir_lote([[-100, np.nan, 60], [np.nan, 60, 60], [-100, np.inf, 60], [-100, 60, -np.inf]])
+    if any(estado != TIR_FLUJO_INVALIDO for estado in estados):
+        errores.append(f"tir_lote: flujos no finitos marcados {estados.tolist()}")
+    return errores
+
+# --- FIXTURES GENERADOS ---
+
+def pdf_sintetico(paginas, lineas=40):
+    # PDF mínimo con texto (fuente Helvetica estándar) escrito a mano: sin dependencias extra
+    objetos = []
+
+    def agregar(contenido):
+        objetos.append(contenido)
+        return len(objetos)
+
+    fuente = agregar(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    id_paginas = 1 + 2 * paginas + 1
+    hijos = []
+    for p in range(paginas):
+        texto = "BT /F1 10 Tf 50 780 Td 12 TL " + " ".join(
+            f"(Pagina {p + 1} linea {i}: vacunacion aftosa, control de garrapatas y pesaje al destete) '"
+            for i in range(lineas)) + " ET"
+        contenido = agregar(b"<< /Length %d >>\nstream\n" % len(texto) + texto.encode() + b"\nendstream")
+        hijos.append(agregar(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                             b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (id_paginas, contenido, fuente)))
+    agregar(b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % h for h in hijos) + b"] /Count %d >>" % paginas)
+    catalogo = agregar(b"<< /Type /Catalog /Pages %d 0 R >>" % id_paginas)
+
+    salida = bytearray(b"%PDF-1.4\n")
+    posiciones = []
+    for i, objeto in enumerate(objetos, start=1):
+        posiciones.append(len(salida))
+        salida += b"%d 0 obj\n" % i + objeto + b"\nendobj\n"
+    xref = len(salida)
+    salida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    salida += b"".join(b"%010d 00000 n \n" % p for p in posiciones)
+    salida += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, catalogo, xref)
+    return bytes(salida)
+
+def docx_sintetico(parrafos):
+    import docx
+    documento = docx.Document()
+    for i in range(parrafos):
+        documento.add_paragraph(f"Párrafo {i}: protocolo de IATF, condición corporal y manejo del pastoreo Mombasa.")
+    buffer = io.BytesIO()
+    documento.save(buffer)
+    return buffer.getvalue()
+
+def txt_sintetico(kilobytes):
+    linea = "Registro sanitario: desparasitación, vitaminas ADE y vacuna triple en terneros destetados.\n"
+    return (linea * (kilobytes * 1024 // len(linea) + 1)).encode("utf-8")
+
+# --- MEDICIÓN ---
+
+def medir(funcion, repeticiones, preparar=None):
+    # Mediana en segundos de `repeticiones` corridas, después de una de calentamiento
+    if preparar:
+        preparar()
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+def escenarios_aleatorios(n, semilla=7):
+    rng = np.random.default_rng(semilla)
+    base = GanaderiaConfig()
+    escenarios = {campo: np.full(n, float(getattr(base, campo))) for campo in CAMPOS_CONFIG}
+    escenarios["tasa_preñez_iatf"] = rng.uniform(0.3, 0.7, n)
+    escenarios["mortalidad_cria"] = rng.uniform(0.0, 0.10, n)
+    escenarios["precio_macho_destete"] = rng.uniform(2.0, 3.5, n)
+    escenarios["capacidad_maxima"] = rng.choice([800.0, 1500.0, 3000.0], n)
+    return escenarios
+
+def etapas_simulacion(rapido):
+    n = 1_000 if rapido else 10_000
+    repeticiones = 3 if rapido else 7
+    config = GanaderiaConfig()
+    etapas = {}
+    for years in (10, 30, 100):
+        etapas[f"simular_proyecto_{years}a"] = medir(lambda: simular_proyecto(years, config), repeticiones)
+    escenarios = escenarios_aleatorios(n)
+    for years in (10, 30):
+        etapas[f"simular_lote_{n}x{years}a"] = medir(lambda: simular_lote(escenarios, years), repeticiones)
+    etapas["cohortes_mensual_10a"] = medir(lambda: simular_cohortes(10, config, pasos_por_anio=12), repeticiones)
+
+    df = simular_proyecto(10, config)
+    flujos = [-config.capex_infraestructura] + df["Flujo Neto (Socios)"].tolist()
+    etapas["tir_dashboard"] = medir(lambda: tir_lote(flujos), repeticiones * 3)
+    resultados = simular_lote(escenarios, 10)
+    matriz = np.column_stack([np.full(n, -config.capex_infraestructura), resultados["Flujo Neto (Socios)"]])
+    etapas[f"tir_lote_{n}"] = medir(lambda: tir_lote(matriz), repeticiones)
+
+    rng = np.random.default_rng(7)
+    fincas = [{"Finca": f"Finca {i}", "Año Inicio": int(rng.integers(1, 11)), "vientres_iniciales": int(rng.integers(100, 800)),
+               "capacidad_maxima": int(rng.integers(500, 3000)), "capex_infraestructura": int(rng.integers(50_000, 300_000))}
+              for i in range(300)]
+    etapas["cartera_300x30a"] = medir(lambda: simular_cartera(fincas, 30), repeticiones)
+    etapas["cartera_300x30a_bolsa_comun"] = medir(lambda: simular_cartera(fincas, 30, bolsa_comun=True), repeticiones)
+    return etapas
+
+def etapas_extraccion(rapido):
+    repeticiones = 2 if rapido else 3
+    fixtures = {}
+    for paginas in ((10, 50) if rapido else (10, 100, 300)):
+        fixtures[f"pdf_{paginas}p"] = (f"manual_{paginas}.pdf", pdf_sintetico(paginas))
+    for parrafos in ((500,) if rapido else (500, 5_000)):
+        fixtures[f"docx_{parrafos}par"] = (f"notas_{parrafos}.docx", docx_sintetico(parrafos))
+    for kilobytes in ((100,) if rapido else (100, 2_000)):
+        fixtures[f"txt_{kilobytes}kb"] = (f"registro_{kilobytes}.txt", txt_sintetico(kilobytes))
+
+    etapas = {}
+    for clave, (nombre, datos) in fixtures.items():
+        # En frío: sin caché en memoria ni en disco (un solo proceso: el tiempo del parser)
+        etapas[f"extraccion_{clave}"] = medir(lambda: ingesta.extraer_texto(nombre, datos, procesos=1, carpeta=None),
+                                              repeticiones, preparar=ingesta.vaciar_cache)
+    # Con caché: lo que cuesta cada rerun después del primer parseo
+    nombre, datos = fixtures[max((c for c in fixtures if c.startswith("pdf_")), key=lambda c: len(fixtures[c][1]))]
+    etapas["extraccion_pdf_en_cache"] = medir(lambda: ingesta.extraer_texto(nombre, datos, carpeta=None), 20)
+
+    # Umbral del pool: un PDF de MIN_PAGINAS_POOL páginas en serie y en el pool (al menos 2 procesos,
+    # aunque la máquina tenga un núcleo). Si el pool pierde aquí en una máquina con varios núcleos,
+    # hay que subir MIN_PAGINAS_POOL.
+    paginas = ingesta.MIN_PAGINAS_POOL
+    nombre, datos = f"manual_{paginas}.pdf", pdf_sintetico(paginas)
+    procesos = max(2, min(os.cpu_count() or 1, 4))
+    etapas[f"extraccion_pdf_umbral_{paginas}p_serie"] = medir(
+        lambda: ingesta.extraer_texto(nombre, datos, procesos=1, carpeta=None), 1 if rapido else 3,
+        preparar=ingesta.vaciar_cache)
+    etapas[f"extraccion_pdf_umbral_{paginas}p_pool{procesos}"] = medir(
+        lambda: ingesta.extraer_texto(nombre, datos, procesos=procesos, carpeta=None), 1 if rapido else 3,
+        preparar=ingesta.vaciar_cache)
+    return etapas
+
+CONSULTAS = ["¿Qué dosis de diminazeno uso para tripanosomiasis?", "Calendario de vacunación contra aftosa",
+             "¿Cómo manejo los pediluvios con sulfato de cobre?", "Protocolo de IATF y condición corporal",
+             "¿Cuándo se recupera la inversión en el flujo de caja?"]
+
+def etapas_contexto(rapido, carpeta):
+    with open(RUTA_CEREBRO, encoding="utf-8") as f:
+        textos = {"Cerebro Maestro": f.read()}
+    etapas = {}
+    contador = iter(range(10 ** 6))
+    # Construcción: cada repetición en una carpeta nueva para no leer el índice guardado
+    etapas["contexto_construir_indice"] = medir(
+        lambda: cargar_o_construir(textos, os.path.join(carpeta, f"indice_{next(contador)}")), 3 if rapido else 5)
+    carpeta_fija = os.path.join(carpeta, "indice_fijo")
+    indice, _ = cargar_o_construir(textos, carpeta_fija)
+    etapas["contexto_cargar_indice"] = medir(lambda: cargar_o_construir(textos, carpeta_fija), 5 if rapido else 10)
+    etapas["contexto_consultas_x5"] = medir(
+        lambda: [armar_contexto(indice.buscar(c, TOP_K)) for c in CONSULTAS], 10 if rapido else 30)
+    caracteres = statistics.mean(len(armar_contexto(indice.buscar(c, TOP_K))) for c in CONSULTAS)
+    return etapas, {"contexto_caracteres_promedio": round(caracteres), "cerebro_caracteres": len(textos["Cerebro Maestro"])}, indice
+
+def etapas_asistente(rapido, indice):
+    # Ida y vuelta contra el servidor falso (sin demora: mide el costo propio del pipeline)
+    servidor = servidor_falso.arrancar(demora=0.0)
+    try:
+        backend = crear_backend("gemini", api_key="benchmark", base_url=servidor.url, reintentos=0)
+        mensajes = [{"role": "user", "content": CONSULTAS[0]}, {"role": "assistant", "content": servidor.texto}]
+        primeros = []
+
+        def ida_y_vuelta():
+            pregunta = CONSULTAS[1]
+            relevantes = indice.buscar(pregunta, TOP_K)
+            system_instruction = "Eres el experto veterinario de Agroven." + armar_contexto(relevantes)
+            historial, _ = ventana_historial(mensajes, system_instruction, pregunta)
+            respuesta = "".join(backend.responder(pregunta, system_instruction, relevantes, historial))
+            primeros.append(backend.metricas["primer_trozo_s"])
+            return respuesta
+
+        repeticiones = 5 if rapido else 20
+        etapas = {"asistente_ida_y_vuelta": medir(ida_y_vuelta, repeticiones),
+                  "asistente_primer_trozo": statistics.median(primeros[1:])}
+
+        respuestas = CacheRespuestas()
+        huella = huella_contexto("contexto", backend.modelo)
+        respuestas.guardar(CONSULTAS[1], huella, servidor.texto)
+        etapas["asistente_respuesta_en_cache"] = medir(lambda: respuestas.obtener(CONSULTAS[1], huella), 50)
+        return etapas, {"pedidos_al_servidor": servidor.pedidos}
+    finally:
+        servidor.shutdown()
+
+# --- COMPARACIÓN CON LA BASE ---
+
+def comparar(actual, base, umbral):
+    # Devuelve (filas de la tabla, etapas con regresión)
+    filas, regresiones = [], []
+    for nombre, segundos in actual.items():
+        anterior = base.get(nombre)
+        if anterior is None:
+            filas.append((nombre, None, segundos, None, ""))
+            continue
+        cambio = segundos / anterior - 1 if anterior > 0 else 0.0
+        regresion = cambio > umbral and segundos - anterior > PISO_SEGUNDOS
+        if regresion:
+            regresiones.append(nombre)
+        filas.append((nombre, anterior, segundos, cambio, "REGRESIÓN" if regresion else ""))
+    return filas, regresiones
+
+def _ms(segundos):
+    return "-" if segundos is None else f"{segundos * 1000:,.3f}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark y verificación de cifras del simulador Agroven.")
+    parser.add_argument("--rapido", action="store_true", help="Tamaños y repeticiones reducidos")
+    parser.add_argument("--guardar", action="store_true", help="Guardar las mediciones como nueva base")
+    parser.add_argument("--base", default=RUTA_BASE, help="Archivo de base (JSON)")
+    parser.add_argument("--umbral", type=float, default=UMBRAL, help="Regresión tolerada (0.30 = 30%%)")
+    parser.add_argument("--solo", default=None, help="Sólo etapas cuyo nombre contiene este texto")
+    parser.add_argument("--salida", default=None, help="Guardar también esta corrida en un JSON")
+    parser.add_argument("--sin-golden", action="store_true",
+                        help="No verificar las cifras del dashboard ni la equivalencia lote/proyecto y TIR")
+    parser.add_argument("--actualizar-golden", action="store_true",
+                        help="Reescribir golden.json con las cifras actuales (sólo si cambian las reglas)")
+    args = parser.parse_args(argv)
+    fallo = False
+
+    if args.actualizar_golden:
+        with open(RUTA_GOLDEN, "w", encoding="utf-8") as f:
+            json.dump(generar_golden(), f, ensure_ascii=False, indent=1)
+        print(f"golden.json reescrito ({len(CASOS_GOLDEN)} casos)")
+    elif not args.sin_golden:
+        with open(RUTA_GOLDEN, encoding="utf-8") as f:
+            errores = verificar_golden(json.load(f))
+        if errores:
+            fallo = True
+            print(f"GOLDEN: {len(errores)} diferencias")
+            for error in errores[:20]:
+                print(f"  {error}")
+        else:
+            print(f"GOLDEN: {len(CASOS_GOLDEN)} casos idénticos")
+        errores = verificar_equivalencia(300 if args.rapido else 1_500)
+        if errores:
+            fallo = True
+            print(f"EQUIVALENCIA: {len(errores)} diferencias")
+            for error in errores[:20]:
+                print(f"  {error}")
+        else:
+            print("EQUIVALENCIA: simular_lote == simular_proyecto y tir_lote == npf.irr")
+        errores = verificar_contratos()
+        if errores:
+            fallo = True
+            print(f"CONTRATOS: {len(errores)} incumplidos")
+            for error in errores:
+                print(f"  {error}")
+        else:
+            print("CONTRATOS: cumplidos")
+
+    etapas, info = {}, {}
+    with tempfile.TemporaryDirectory() as carpeta:
+        etapas.update(etapas_simulacion(args.rapido))
+        etapas.update(etapas_extraccion(args.rapido))
+        contexto, info_contexto, indice = etapas_contexto(args.rapido, carpeta)
+        etapas.update(contexto)
+        info.update(info_contexto)
+        asistente, info_asistente = etapas_asistente(args.rapido, indice)
+        etapas.update(asistente)
+        info.update(info_asistente)
+    if args.solo:
+        etapas = {nombre: s for nombre, s in etapas.items() if args.solo in nombre}
+
+    base = {}
+    if os.path.exists(args.base):
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)["etapas"]
+    filas, regresiones = comparar(etapas, base, args.umbral)
+    print(f"\n{'Etapa':<34}{'Base (ms)':>14}{'Actual (ms)':>14}{'Cambio':>10}")
+    for nombre, anterior, segundos, cambio, marca in filas:
+        texto_cambio = "-" if cambio is None else f"{cambio:+.0%}"
+        print(f"{nombre:<34}{_ms(anterior):>14}{_ms(segundos):>14}{texto_cambio:>10}  {marca}")
+    for clave, valor in info.items():
+        print(f"{clave}: {valor:,}")
+    if not base:
+        print(f"\nSin base en {args.base}: use --guardar para crearla.")
+    elif regresiones:
+        fallo = True
+        print(f"\n{len(regresiones)} etapas más lentas que la base en más de {args.umbral:.0%}: {', '.join(regresiones)}")
+
+    corrida = {"fecha": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+               "plataforma": platform.platform(), "cpus": os.cpu_count(), "rapido": args.rapido,
+               "etapas": etapas, "info": info}
+    if args.guardar:
+        if os.path.dirname(args.base):
+            os.makedirs(os.path.dirname(args.base), exist_ok=True)
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump(corrida, f, ensure_ascii=False, indent=1)
+        print(f"Base guardada en {args.base}")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(corrida, f, ensure_ascii=False, indent=1)
+    return 1 if fallo else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
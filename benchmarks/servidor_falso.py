@@ -0,0 +1,81 @@
+# --- SERVIDOR FALSO DEL MODELO (Gemini compatible) ---
+# Responde streamGenerateContent / generateContent con texto fijo y una demora configurable por
+# trozo, sin red externa. Sirve para medir la latencia del asistente sin gastar cuota:
+#   python benchmarks/servidor_falso.py --puerto 8765 --demora 0.05
+#   AGROVEN_GEMINI_URL=http://127.0.0.1:8765 streamlit run app.py
+# Desde código: servidor = arrancar(demora=0.0); servidor.url; servidor.shutdown()
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TEXTO_RESPUESTA = ("Para tripanosomiasis se recomienda diminazeno a 3.5 mg/kg por vía intramuscular profunda, "
+                   "repitiendo según evolución clínica y control de vectores en el potrero.")
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _cuerpo(self):
+        largo = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(largo) or b"{}")
+
+    def do_POST(self):
+        servidor = self.server
+        pedido = self._cuerpo()
+        with servidor.lock:
+            servidor.pedidos += 1
+            servidor.ultimo_pedido = pedido
+        palabras = servidor.texto.split(" ")
+        trozos = [" ".join(palabras[i:i + servidor.palabras_por_trozo]) + " "
+                  for i in range(0, len(palabras), servidor.palabras_por_trozo)]
+
+        if ":streamGenerateContent" in self.path:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for trozo in trozos:
+                time.sleep(servidor.demora)
+                evento = {"candidates": [{"content": {"role": "model", "parts": [{"text": trozo}]}}]}
+                self.wfile.write(b"data: " + json.dumps(evento).encode() + b"\r\n\r\n")
+                self.wfile.flush()
+            self.close_connection = True
+        else:
+            time.sleep(servidor.demora * len(trozos))
+            cuerpo = json.dumps({"candidates": [{"content": {"role": "model",
+                                                             "parts": [{"text": "".join(trozos)}]}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+def arrancar(puerto=0, demora=0.0, texto=TEXTO_RESPUESTA, palabras_por_trozo=4):
+    # Servidor en un hilo de fondo; puerto 0 = uno libre. Devuelve el servidor con .url
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), _Manejador)
+    servidor.daemon_threads = True
+    servidor.demora = demora
+    servidor.texto = texto
+    servidor.palabras_por_trozo = palabras_por_trozo
+    servidor.lock = threading.Lock()
+    servidor.pedidos = 0
+    servidor.ultimo_pedido = None
+    servidor.url = f"http://127.0.0.1:{servidor.server_address[1]}"
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor falso compatible con la API de Gemini.")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--demora", type=float, default=0.05, help="Segundos entre trozos (0.05)")
+    args = parser.parse_args()
+    servidor = arrancar(args.puerto, args.demora)
+    print(f"Servidor falso en {servidor.url} (Ctrl+C para salir)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()